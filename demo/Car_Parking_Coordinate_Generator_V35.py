@@ -9,6 +9,7 @@ class Coordinate_denoter:
         self.rect_width = 50
         self.rect_height = 30
         self.file_path = "positions.json"
+        self.extra_fields = []  # Claves adicionales de cada espacio (por ejemplo "threshold"), se conservan al guardar
 
     def read_positions(self):
         try:
@@ -17,6 +18,10 @@ class Coordinate_denoter:
                 self.car_park_positions = [
                     (pos["x"], pos["y"], pos["angle"], pos["width"], pos["height"]) for pos in data
                 ]
+                self.extra_fields = [
+                    {key: value for key, value in pos.items() if key not in ("x", "y", "angle", "width", "height")}
+                    for pos in data
+                ]
         except FileNotFoundError:
             print("Archivo de posiciones no encontrado. Se creará uno nuevo al guardar.")
         except Exception as e:
@@ -28,6 +33,8 @@ class Coordinate_denoter:
                 {"x": pos[0], "y": pos[1], "angle": angle, "width": width, "height": height}
                 for pos, angle, width, height in zip(positions, angles, widths, heights)
             ]
+            for space, extra in zip(data, self.extra_fields):
+                space.update(extra)
             with open(self.file_path, "w") as f:
                 json.dump(data, f, indent=4)
             print("Posiciones guardadas correctamente.")
@@ -258,6 +265,7 @@ class CoordinateManipulator:
                 self.rect_widths.append(self.coordinate_generator.rect_width)
                 self.rect_heights.append(self.coordinate_generator.rect_height)
                 self.rotation_angles.append(0)
+                self.coordinate_generator.extra_fields.append({})
 
             self.selected_rect = None
 
@@ -289,6 +297,7 @@ class CoordinateManipulator:
             del self.rect_widths[self.selected_rect]
             del self.rect_heights[self.selected_rect]
             del self.rotation_angles[self.selected_rect]
+            del self.coordinate_generator.extra_fields[self.selected_rect]
             self.selected_rect = None
 
     def resize_selected_rectangle(self, delta):
@@ -305,6 +314,7 @@ class CoordinateManipulator:
         self.rect_widths.append(self.coordinate_generator.rect_width)
         self.rect_heights.append(self.coordinate_generator.rect_height)
         self.rotation_angles.append(0)
+        self.coordinate_generator.extra_fields.append({})
 
     def save_positions(self):
         self.coordinate_generator.save_positions(
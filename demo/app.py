@@ -1,14 +1,57 @@
-from flask import Flask, render_template
-from predictest_7 import predecir_proximo_espacio_libre  # Importar la función de predicción
+import os
+import threading
+
+from flask import Flask, jsonify, render_template
+from prediction import (DATA_PATH, MODEL_PATH, PredictionCache, RetrainWorker, atomic_write_text,
+                        follow_occupancy_events)
 
 app = Flask(__name__)
 
+# Modelo guardado en disco, cargado al arrancar; el reentrenamiento corre en segundo plano
+retrain_worker = RetrainWorker(MODEL_PATH, DATA_PATH)
+
+# Eventos de llegadas y salidas de la API del clasificador (demo_test_V10_2.py)
+EVENTS_URL = os.environ.get("SMARTPARKING_EVENTS_URL", "http://127.0.0.1:8001/events")
+
+# Predicción en memoria; prediccion.txt solo se reescribe cuando cambia el espacio predicho
+prediction_cache = PredictionCache(lambda: retrain_worker.model,
+                                   on_change=lambda espacio: atomic_write_text("prediccion.txt", str(espacio)))
+
+
+def predecir_proximo_espacio_libre():
+    """Predice el próximo espacio libre con la última ocupación recibida de la API del clasificador.
+
+    Se recalcula solo con otro modelo, otro intervalo de tiempo u otra ocupación.
+    """
+    return prediction_cache.get()
+
+
+def actualizar_por_evento(espacios_ocupados):
+    """Una llegada o salida actualiza la ocupación y la predicción se recalcula de inmediato."""
+    prediction_cache.update_occupancy(espacios_ocupados)
+    predecir_proximo_espacio_libre()
+
 @app.route("/")
 def index():
     # Obtener la predicción del próximo espacio libre
     espacio_predicho = predecir_proximo_espacio_libre()
     return render_template("index.html", espacio_predicho=espacio_predicho)
 
+@app.route("/run-prediction")
+def run_prediction():
+    # El tablero llama a esta ruta periódicamente para refrescar prediccion.txt
+    espacio_predicho = predecir_proximo_espacio_libre()
+    model = retrain_worker.model
+    response = jsonify({
+        "espacio_predicho": espacio_predicho,
+        "version": model.version if model is not None else None,
+        "cache": prediction_cache.metrics,
+    })
+    response.headers["Access-Control-Allow-Origin"] = "*"  # El tablero se sirve desde Apache
+    return response, 200 if espacio_predicho is not None else 503
+
 if __name__ == "__main__":
+    retrain_worker.start()
+    threading.Thread(target=follow_occupancy_events, args=(EVENTS_URL, actualizar_por_evento), daemon=True).start()
     # Usa una de las opciones para evitar la ejecución doble
     app.run(debug=True, use_reloader=False)  # Opción más directa
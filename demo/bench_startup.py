@@ -0,0 +1,52 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Importa el módulo en un intérprete nuevo e imprime el tiempo que tardó
+MEDIR_IMPORTACION = """
+import sys, time
+inicio = time.perf_counter()
+import {modulo}
+print(time.perf_counter() - inicio)
+print(int("tensorflow" in sys.modules))
+"""
+
+
+def medir(modulo: str, repeticiones: int) -> tuple:
+    """Devuelve la mediana del tiempo de importación en frío y si se cargó TensorFlow."""
+    tiempos = []
+    tensorflow = False
+    for _ in range(repeticiones):
+        resultado = subprocess.run([sys.executable, "-c", MEDIR_IMPORTACION.format(modulo=modulo)],
+                                   capture_output=True, text=True)
+        if resultado.returncode != 0:
+            raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+        tiempo, cargo_tf = resultado.stdout.split()[-2:]
+        tiempos.append(float(tiempo))
+        tensorflow = tensorflow or cargo_tf == "1"
+    return statistics.median(tiempos), tensorflow
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mide el arranque en frío de los módulos del visualizador y del predictor.")
+    parser.add_argument("--modulos", nargs="+", default=["prediction", "server", "src.utils_V9", "demo_test_10", "app"])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto", type=float, default=0.5, help="Segundos máximos por módulo")
+    parser.add_argument("--omitir-faltantes", action="store_true",
+                        help="No contar como excedidos los módulos que no se pueden importar")
+    args = parser.parse_args()
+
+    excedidos = 0
+    for modulo in args.modulos:
+        try:
+            tiempo, tensorflow = medir(modulo, args.repeticiones)
+        except RuntimeError as e:
+            print(f"{modulo:<15} no se pudo importar: {e}")
+            excedidos += not args.omitir_faltantes  # Sin medir no se sabe si cumple el presupuesto
+            continue
+        estado = "OK" if tiempo <= args.presupuesto and not tensorflow else "EXCEDIDO"
+        excedidos += estado != "OK"
+        print(f"{modulo:<15} {tiempo * 1000:>8.1f} ms  TensorFlow: {'sí' if tensorflow else 'no'}  {estado}")
+    sys.exit(1 if excedidos else 0)
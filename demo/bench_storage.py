@@ -0,0 +1,41 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from src.db_writer import ParkingEvent
+from src.storage import SQLiteParkingStorage
+
+
+def generar_eventos(total: int, espacios: int) -> list:
+    """Genera llegadas y salidas alternadas para ``espacios`` espacios."""
+    inicio = datetime.now()
+    eventos = []
+    for i in range(total):
+        espacio = i % espacios + 1
+        estado = "Ocupado" if (i // espacios) % 2 == 0 else "Libre"
+        eventos.append(ParkingEvent(espacio, estado, inicio + timedelta(seconds=i)))
+    return eventos
+
+
+def medir(storage, eventos: list, lote: int) -> float:
+    """Escribe los eventos en lotes de ``lote`` y devuelve eventos por segundo."""
+    inicio = time.perf_counter()
+    for i in range(0, len(eventos), lote):
+        storage.write_events(eventos[i:i + lote])
+    return len(eventos) / (time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de escritura del almacenamiento SQLite.")
+    parser.add_argument("--eventos", type=int, default=20000)
+    parser.add_argument("--espacios", type=int, default=65)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    eventos = generar_eventos(args.eventos, args.espacios)
+    with tempfile.TemporaryDirectory() as carpeta:
+        for lote in args.lotes:
+            storage = SQLiteParkingStorage(os.path.join(carpeta, f"bench_{lote}.db"))
+            print(f"Lote de {lote:>5}: {medir(storage, eventos, lote):>10.0f} eventos/s")
+            storage.close_connection()
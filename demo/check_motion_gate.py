@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+from src.layout import rotated_space_corners
+from src.storage import SQLiteParkingStorage
+from src.utils_V9 import Park_classifier
+
+
+def generar_cuadros(posiciones: list, cuadros: int, semilla: int) -> list:
+    """Estacionamiento sintético: fondo con textura fija y autos de poco contraste que llegan y se van."""
+    rng = np.random.default_rng(semilla)
+    fondo = rng.integers(90, 110, (480, 640, 3), dtype=np.uint8)
+    fondo = cv2.GaussianBlur(fondo, (5, 5), 0)
+    ocupados = {}  # Espacio -> nivel de gris del auto
+    resultado = []
+    for _ in range(cuadros):
+        # En cada cuadro llega o se va un auto en hasta tres espacios
+        for i in rng.choice(len(posiciones), size=int(rng.integers(0, 4)), replace=False):
+            if ocupados.pop(int(i), None) is None:
+                ocupados[int(i)] = int(rng.integers(120, 150))  # Auto gris, poco contraste con el asfalto
+        cuadro = fondo.copy()
+        for i, gris in sorted(ocupados.items()):
+            # El auto ocupa el interior del espacio rotado, con una línea oscura como parabrisas
+            x, y, angulo, ancho, alto = posiciones[i]
+            centro = np.float32([x + ancho // 2, y + alto // 2])
+            esquinas = rotated_space_corners(x, y, angulo, ancho, alto)
+            auto = np.int32(centro + (esquinas - centro) * 0.75)
+            cv2.fillPoly(cuadro, [auto], (gris, gris, gris))
+            cv2.line(cuadro, tuple(map(int, (auto[0] + auto[1]) // 2)), tuple(map(int, (auto[2] + auto[3]) // 2)),
+                     (60, 60, 60), 1)
+        # El mismo cuadro repetido, como cuando la cámara IP no envía uno nuevo
+        resultado.extend([cuadro] * int(rng.integers(1, 3)))
+    return resultado
+
+
+def crear_clasificador(posiciones_path: str, carpeta: str, nombre: str, **kwargs) -> Park_classifier:
+    storage = SQLiteParkingStorage(os.path.join(carpeta, f"{nombre}.db"))
+    return Park_classifier(posiciones_path, crop_to_lot=True, storage=storage, journal_path=None, stats_path=None,
+                           **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Comprueba que evaluate_frame da los mismos conteos que evaluate en cuadros sintéticos.")
+    parser.add_argument("--posiciones", default="positions.json")
+    parser.add_argument("--cuadros", type=int, default=60)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        completo = crear_clasificador(args.posiciones, carpeta, "completo")
+        # Sin refresco periódico para que solo el detector de cambios decida qué reclasificar
+        por_cambios = crear_clasificador(args.posiciones, carpeta, "por_cambios", full_refresh_frames=sys.maxsize)
+        cuadros = generar_cuadros(completo.car_park_positions, args.cuadros, args.semilla)
+
+        diferencias = 0
+        for n, cuadro in enumerate(cuadros):
+            esperado = completo.evaluate(completo.implement_process(cuadro))
+            obtenido = por_cambios.evaluate_frame(cuadro)
+            distintos = np.flatnonzero(esperado.counts != obtenido.counts)
+            if distintos.size:
+                diferencias += 1
+                print(f"Cuadro {n}: conteos distintos en los espacios {(distintos + 1).tolist()}")
+
+        for clasificador in (completo, por_cambios):
+            clasificador.close()
+
+    print(f"{len(cuadros)} cuadros, {por_cambios.skipped_frames} sin procesar, {diferencias} con diferencias")
+    sys.exit(1 if diferencias else 0)
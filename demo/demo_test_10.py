@@ -41,7 +41,8 @@ def mouse_callback(event, x, y, flags, param):
            prediction_button_y <= y <= prediction_button_y + prediction_button_height:
             # Llamar a la función de predicción y actualizar el texto
             try:
-                predict_next_free_space()  # Actualizar demo9.txt con la predicción
+                # param es el clasificador: se ordenan sus espacios ocupados por tiempo restante
+                predict_next_free_space(param.espacios_ocupados)  # Actualizar demo9.txt con la predicción
                 with open("demo9.txt", "r", encoding="utf-8") as file:
                     prediction_text = file.readline().strip()
             except Exception as e:
@@ -71,7 +72,7 @@ def demostration():
     rect_width, rect_height = 50, 30  # Tamaños predeterminados de los cuadros
 
     # Creando la instancia del clasificador
-    classifier = Park_classifier(positions_json_path, rect_width, rect_height)
+    classifier = Park_classifier(positions_json_path, rect_width, rect_height, crop_to_lot=True)
 
     # Obtener las cámaras disponibles
     cameras = get_available_cameras()
@@ -90,7 +91,7 @@ def demostration():
     # Configurar la ventana OpenCV para pantalla completa
     cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
     cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-    cv2.setMouseCallback(window_name, mouse_callback)
+    cv2.setMouseCallback(window_name, mouse_callback, classifier)
 
     try:
         while True:
@@ -161,7 +162,7 @@ def demostration():
         classifier.handle_exit()
         cap.release()
         cv2.destroyAllWindows()
-        classifier.db_manager.close_connection()  # Cerrar la conexión a la base de datos
+        classifier.close()  # Escribir los eventos pendientes y cerrar la conexión a la base de datos
 
 if __name__ == "__main__":
     demostration()
@@ -122,7 +122,7 @@ def demostration():
         classifier.handle_exit()
         cap.release()
         cv2.destroyAllWindows()
-        classifier.db_manager.close_connection()  # Cerrar la conexión a la base de datos
+        classifier.close()  # Escribir los eventos pendientes y cerrar la conexión a la base de datos
 
 if __name__ == "__main__":
     demostration()
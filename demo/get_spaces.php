@@ -14,28 +14,22 @@ if ($conn->connect_error) {
     die(json_encode(['error' => 'Conexión fallida: ' . $conn->connect_error]));
 }
 
-// Consulta SQL mejorada para obtener los espacios y sus estados
+// Último estado de cada espacio: current_state tiene una fila por espacio y la
+// mantiene actualizada el escritor del clasificador, así que no hace falta agrupar
+// el historial de state_date en cada consulta
 $sql = "
 SELECT 
-    sd.parking_spaces_id_sd,
-    sd.estado,
-    sd.hora_cambio,
+    cs.parking_spaces_id_sd,
+    cs.estado,
+    cs.hora_cambio,
     CASE
-        WHEN sd.estado = 'Libre' THEN 'Hora desde que se desocupó'
-        WHEN sd.estado = 'Ocupado' THEN 'Hora desde que se ocupó'
+        WHEN cs.estado = 'Libre' THEN 'Hora desde que se desocupó'
+        WHEN cs.estado = 'Ocupado' THEN 'Hora desde que se ocupó'
         ELSE 'Estado desconocido'
     END AS descripcion_estado
-FROM state_date sd
-INNER JOIN (
-    SELECT 
-        parking_spaces_id_sd, 
-        MAX(hora_cambio) AS max_hora_cambio
-    FROM state_date
-    WHERE fecha = DATE(NOW())
-    GROUP BY parking_spaces_id_sd
-) latest
-ON sd.parking_spaces_id_sd = latest.parking_spaces_id_sd
-AND sd.hora_cambio = latest.max_hora_cambio;
+FROM current_state cs
+WHERE cs.fecha = DATE(NOW())
+ORDER BY cs.parking_spaces_id_sd;
 ";
 
 $result = $conn->query($sql);
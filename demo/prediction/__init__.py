@@ -0,0 +1,33 @@
+"""Predicción del próximo espacio libre con un modelo entrenado en segundo plano."""
+
+from .cache import PredictionCache, follow_occupancy_events
+from .history import DB_CONFIG, TrainingData, stream_history, update_training_data
+from .model import ModelStore, PredictionModel, atomic_write_text, train_model
+from .runtime import DenseRuntime, export_dense_model
+from .survival import DwellSurvivalModel
+from .worker import RetrainWorker, train_and_save
+
+# Artefacto compartido por app.py (que lo reentrena) y server.py (que solo lo usa)
+MODEL_PATH = "modelo_prediccion.json"
+# Características del historial ya leídas de parking_records (se actualiza en cada reentrenamiento)
+DATA_PATH = "historial_prediccion.npz"
+
+__all__ = [
+    "DATA_PATH",
+    "DB_CONFIG",
+    "DenseRuntime",
+    "DwellSurvivalModel",
+    "MODEL_PATH",
+    "ModelStore",
+    "PredictionCache",
+    "PredictionModel",
+    "RetrainWorker",
+    "TrainingData",
+    "atomic_write_text",
+    "export_dense_model",
+    "follow_occupancy_events",
+    "stream_history",
+    "train_and_save",
+    "train_model",
+    "update_training_data",
+]
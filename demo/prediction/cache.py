@@ -0,0 +1,125 @@
+import datetime
+import json
+import threading
+import urllib.request
+
+
+class PredictionCache:
+    """Última predicción en memoria, válida mientras no cambien el modelo, la hora o la ocupación.
+
+    ``get`` solo vuelve a llamar a ``model.predict`` si cambió la versión del modelo
+    que devuelve ``model_source``, el intervalo de tiempo o los espacios ocupados
+    ``{espacio: hora_llegada}`` (los que se pasan a ``get`` o, si no, los últimos
+    recibidos con ``update_occupancy``). Con espacios ocupados y un modelo con
+    ``survival`` el intervalo es el paso de sus curvas, porque el tiempo restante de
+    cada auto cambia mientras sigue estacionado; si no, es la hora del día, que es lo
+    único de lo que depende la tabla.
+
+    ``on_change`` recibe el espacio predicho cada vez que cambia, para que el archivo
+    de predicción solo se reescriba cuando hace falta. Se llama con el candado tomado,
+    así que aunque consulten varios hilos los cambios llegan en orden y el último
+    escrito es el vigente. ``metrics`` expone los aciertos y fallos.
+    """
+
+    def __init__(self, model_source, on_change=None):
+        self.model_source = model_source  # Función sin argumentos que devuelve el modelo vigente (o None)
+        self.on_change = on_change
+        self.espacios_ocupados = None  # Última ocupación recibida de los eventos
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._key = None  # (versión del modelo, intervalo de tiempo, ocupación) de la predicción guardada
+        self._value = None
+
+    @staticmethod
+    def _time_bucket(model, now: datetime.datetime, espacios_ocupados: dict) -> tuple:
+        if espacios_ocupados and model.survival is not None:
+            return "survival", int(now.timestamp() // model.survival.step)
+        return now.date(), now.hour
+
+    def get(self, now: datetime.datetime = None, espacios_ocupados: dict = None):
+        """Devuelve la predicción vigente; None si todavía no hay modelo."""
+        model = self.model_source()
+        if model is None:
+            return None
+        now = datetime.datetime.now() if now is None else now
+        with self._lock:
+            if espacios_ocupados is None:
+                espacios_ocupados = self.espacios_ocupados
+            key = (model.version, self._time_bucket(model, now, espacios_ocupados),
+                   frozenset(espacios_ocupados.items()) if espacios_ocupados else None)
+            if key == self._key:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            value = model.predict(now, espacios_ocupados)
+            changed = value != self._value
+            self._key, self._value = key, value
+            if changed and self.on_change is not None:
+                self.on_change(value)
+        return value
+
+    def update_occupancy(self, espacios_ocupados: dict):
+        """Guarda la ocupación actual ``{espacio: hora_llegada}`` para las siguientes consultas."""
+        with self._lock:
+            self.espacios_ocupados = dict(espacios_ocupados)
+            self.invalidations += 1
+
+    def invalidate(self):
+        """Descarta la predicción guardada; la siguiente consulta la vuelve a calcular."""
+        with self._lock:
+            self._key = None
+            self.invalidations += 1
+
+    @property
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "version": self._key[0] if self._key else None,
+                "ocupados": len(self.espacios_ocupados) if self.espacios_ocupados is not None else None,
+            }
+
+
+def follow_occupancy_events(url: str, on_change, retry_interval: float = 5.0, stop: threading.Event = None):
+    """Sigue los eventos SSE de la API de ocupación y llama a ``on_change`` con los espacios ocupados.
+
+    Mantiene ``{espacio: hora_llegada}`` con la ``fecha_cambio`` de cada fila: el
+    evento ``snapshot`` (al conectar o reconectar, por si se perdieron eventos) lo
+    reemplaza y cada ``delta`` con espacios lo actualiza. Los cambios que solo traen
+    la predicción no cuentan. Pensada para correr en un hilo aparte: si la API no
+    responde se reintenta cada ``retry_interval`` segundos hasta que se active ``stop``.
+    """
+    stop = stop if stop is not None else threading.Event()
+    espacios_ocupados = {}
+    while not stop.is_set():
+        try:
+            with urllib.request.urlopen(url, timeout=60) as stream:
+                event = None
+                for line in stream:
+                    line = line.decode("utf-8").rstrip("\r\n")
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:") and event in ("snapshot", "delta"):
+                        spaces = json.loads(line[5:])["spaces"]
+                        if event == "snapshot":
+                            espacios_ocupados.clear()
+                        elif not spaces:
+                            continue
+                        for row in spaces:
+                            if row["estado"] == "Ocupado" and row.get("fecha_cambio"):
+                                llegada = datetime.datetime.fromisoformat(row["fecha_cambio"])
+                                espacios_ocupados[row["parking_spaces_id_sd"]] = llegada
+                            else:
+                                espacios_ocupados.pop(row["parking_spaces_id_sd"], None)
+                        on_change(dict(espacios_ocupados))
+                    elif not line:
+                        event = None
+                    if stop.is_set():
+                        return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Sin conexión a los eventos de ocupación ({url}): {e}")
+        stop.wait(retry_interval)
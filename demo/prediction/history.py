@@ -0,0 +1,166 @@
+import os
+
+import numpy as np
+
+# Configuración de la conexión a MySQL
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "",
+    "database": "car_parking"
+}
+
+# Registros completos con salida desde la hora indicada, en orden
+HISTORY_QUERY = """
+    SELECT id, parking_spaces_id, hora_llegada, hora_salida
+    FROM parking_records
+    WHERE hora_llegada IS NOT NULL AND hora_salida IS NOT NULL
+      AND hora_salida >= %s
+    ORDER BY hora_salida, id
+"""
+
+# Margen que se vuelve a leer antes de la marca de agua: hora_salida es la hora del
+# evento, no la de escritura, y una salida puede escribirse tarde (eventos de la
+# bitácora reenviados tras una caída, otra cámara con su lote pendiente)
+LOOKBACK_SECONDS = 24 * 3600
+
+EPOCH = np.datetime64("1970-01-01T00:00:00", "s")
+
+
+def hour_and_weekday(times: np.ndarray) -> tuple:
+    """Hora del día y día de la semana (0 = lunes) de un arreglo ``datetime64``."""
+    dias = times.astype("datetime64[D]")
+    hora = (times - dias).astype("timedelta64[h]").astype(np.int64)
+    return hora, (dias.astype(np.int64) + 3) % 7  # 1970-01-01 fue jueves
+
+
+class TrainingData:
+    """Características del historial de parking_records en arreglos NumPy preasignados.
+
+    Cada registro aporta ``space_id``, ``hora`` y ``dia_semana`` de llegada, y
+    ``duracion`` (segundos). Los arreglos crecen al doble cuando se llenan y
+    ``data[columna]`` devuelve la vista con los registros cargados. ``watermark`` es la
+    ``hora_salida`` más reciente leída, para que la siguiente actualización solo pida
+    los registros desde ahí (menos un margen, ver ``update_training_data``).
+    """
+
+    COLUMNS = {
+        "record_id": np.int64,
+        "space_id": np.int32,
+        "hora": np.int8,
+        "dia_semana": np.int8,  # 0 = lunes, como datetime.weekday()
+        "duracion": np.float64,
+        "hora_salida": "datetime64[s]",
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self._arrays = {name: np.empty(capacity, dtype) for name, dtype in self.COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._arrays[name][:self.size]
+
+    @property
+    def watermark(self) -> np.datetime64:
+        if self.size == 0:
+            return EPOCH
+        return self["hora_salida"].max()
+
+    def _reserve(self, extra: int):
+        capacity = len(self._arrays["record_id"])
+        if self.size + extra <= capacity:
+            return
+        capacity = max(capacity * 2, self.size + extra)
+        for name, array in self._arrays.items():
+            grown = np.empty(capacity, array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._arrays[name] = grown
+
+    def append_rows(self, rows: list):
+        """Agrega un bloque de filas ``(id, espacio, hora_llegada, hora_salida)`` del cursor."""
+        if not rows:
+            return
+        ids, spaces, llegadas, salidas = zip(*rows)
+        llegada = np.array(llegadas, dtype="datetime64[s]")
+        salida = np.array(salidas, dtype="datetime64[s]")
+        hora, dia_semana = hour_and_weekday(llegada)
+
+        self._reserve(len(rows))
+        block = slice(self.size, self.size + len(rows))
+        self._arrays["record_id"][block] = ids
+        self._arrays["space_id"][block] = spaces
+        self._arrays["hora"][block] = hora
+        self._arrays["dia_semana"][block] = dia_semana
+        self._arrays["duracion"][block] = (salida - llegada).astype(np.float64)
+        self._arrays["hora_salida"][block] = salida
+        self.size += len(rows)
+
+    def save(self, path: str):
+        """Guarda los registros cargados de forma atómica."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **{name: self[name] for name in self.COLUMNS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TrainingData":
+        """Carga lo guardado por ``save``; un conjunto vacío si no existe."""
+        try:
+            with np.load(path) as arrays:
+                size = len(arrays["record_id"])
+                data = cls(max(size, 1024))
+                for name in cls.COLUMNS:
+                    data._arrays[name][:size] = arrays[name]
+        except FileNotFoundError:
+            return cls()
+        data.size = size
+        return data
+
+
+def stream_history(db_config: dict = DB_CONFIG, since: np.datetime64 = EPOCH, chunk_size: int = 5000):
+    """Lee los registros con salida desde ``since`` en bloques de ``chunk_size`` filas.
+
+    Usa un cursor del lado del servidor (``SSCursor``): las filas llegan a medida que
+    se piden, sin cargar el resultado completo en memoria.
+    """
+    import pymysql
+    import pymysql.cursors
+
+    since = since.astype("datetime64[s]").item()  # datetime para el conector
+    conn = pymysql.connect(cursorclass=pymysql.cursors.SSCursor, **db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(HISTORY_QUERY, (since,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+    finally:
+        conn.close()
+
+
+def update_training_data(path: str, db_config: dict = DB_CONFIG, chunk_size: int = 5000,
+                         lookback: float = LOOKBACK_SECONDS) -> TrainingData:
+    """Carga las características guardadas en ``path`` y agrega solo los registros nuevos.
+
+    Se vuelven a pedir los registros con salida desde ``lookback`` segundos antes de
+    la marca de agua y se descartan los que ya están guardados (por ``record_id``),
+    así que una salida escrita con hasta ese retraso también se incorpora. Si la
+    base de datos no responde se devuelve lo que ya estaba guardado.
+    """
+    data = TrainingData.load(path)
+    previous = len(data)
+    since = data.watermark - np.timedelta64(int(lookback), "s") if len(data) else EPOCH
+    known = set(data["record_id"][data["hora_salida"] >= since].tolist())
+    try:
+        for rows in stream_history(db_config, since, chunk_size):
+            data.append_rows([row for row in rows if row[0] not in known])
+    except Exception as e:
+        print(f"Error al obtener datos de MySQL: {e}")
+    if len(data) > previous:
+        data.save(path)
+    return data
@@ -0,0 +1,175 @@
+import datetime
+import glob
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .runtime import DenseRuntime
+from .survival import DwellSurvivalModel
+
+
+def atomic_write_text(path: str, text: str):
+    """Escribe el archivo completo de una vez: los lectores ven la versión anterior o la nueva.
+
+    Cada llamada usa su propio temporal en la misma carpeta, así que varios hilos
+    pueden escribir el mismo archivo a la vez sin pisarse.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        os.chmod(tmp_path, 0o644)  # mkstemp lo crea solo legible por el dueño
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class PredictionModel:
+    """Predicción del próximo espacio libre como tabla de consulta día de la semana × hora.
+
+    La red de ``predictest_6`` solo recibe la hora, la duración media del historial
+    (constante por modelo) y el día de la semana, así que tiene como mucho 7 × 24
+    entradas distintas. Al entrenar se evalúa una vez sobre toda esa rejilla y
+    predecir es leer ``table[día, hora]``, sin TensorFlow. ``runtime`` es la misma
+    red exportada a NumPy, para evaluar otras entradas (por ejemplo otra duración) en
+    lote. ``survival`` ordena los espacios ocupados por el tiempo que les falta para
+    liberarse, según cuándo llegó cada auto.
+
+    El artefacto en disco son la red (``<nombre>-<versión>.h5``, para reentrenar o
+    inspeccionarla), la tabla con los pesos exportados (``<nombre>-<versión>.npz``) y
+    un JSON que apunta a ambos. Como el JSON se reemplaza de forma atómica después de
+    escribir los demás, un lector siempre encuentra un conjunto completo.
+    """
+
+    def __init__(self, table: np.ndarray, tiempo_promedio: float, version: str, runtime: DenseRuntime = None,
+                 survival: DwellSurvivalModel = None):
+        self.table = np.asarray(table, dtype=np.int32)  # (7, 24): espacio predicho por día y hora
+        self.tiempo_promedio = float(tiempo_promedio)  # Duración media de ocupación en el historial
+        self.version = version
+        self.runtime = runtime  # Red exportada a NumPy (entradas: hora, duración, día de la semana)
+        self.survival = survival  # Tiempo restante esperado por espacio y hora de la semana
+
+    def predict(self, now: datetime.datetime = None, espacios_ocupados: dict = None) -> int:
+        """Predice qué espacio será el próximo en liberarse.
+
+        Con los espacios ocupados ``{espacio: hora_llegada}`` del clasificador se elige
+        el de menor tiempo restante esperado; sin ellos se usa la tabla de la red.
+        """
+        now = datetime.datetime.now() if now is None else now
+        if espacios_ocupados and self.survival is not None:
+            return self.survival.rank(espacios_ocupados, now)[0][0]
+        return int(self.table[now.weekday(), now.hour])
+
+    def save(self, path: str, network=None):
+        """Guarda el artefacto en ``path`` (JSON) y borra los de versiones anteriores."""
+        base = os.path.splitext(path)[0]
+        table_path = f"{base}-{self.version}.npz"
+        arrays = self.runtime.to_arrays() if self.runtime is not None else {}
+        if self.survival is not None:
+            arrays.update(self.survival.to_arrays())
+        np.savez(table_path, table=self.table, tiempo_promedio=self.tiempo_promedio, **arrays)
+        meta = {"version": self.version, "table": os.path.basename(table_path)}
+        if network is not None:
+            network_path = f"{base}-{self.version}.h5"
+            network.save(network_path)
+            meta["network"] = os.path.basename(network_path)
+        atomic_write_text(path, json.dumps(meta))
+
+        current = {os.path.join(os.path.dirname(path), name) for name in meta.values()}
+        for old_path in glob.glob(f"{glob.escape(base)}-*.npz") + glob.glob(f"{glob.escape(base)}-*.h5"):
+            if old_path not in current:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass  # Otro proceso todavía puede estar cargándolo
+
+    @classmethod
+    def load(cls, path: str):
+        """Carga la tabla del artefacto de ``path``; devuelve None si no existe o está incompleto."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(os.path.join(os.path.dirname(path), meta["table"])) as data:
+                runtime = DenseRuntime.from_arrays(data) if "dense_activations" in data else None
+                survival = DwellSurvivalModel.from_arrays(data) if "survival_remaining" in data else None
+                return cls(data["table"], data["tiempo_promedio"], meta["version"], runtime, survival)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"No se pudo cargar el modelo de predicción {path}: {e}")
+            return None
+
+
+class ModelStore:
+    """Modelo persistido compartido entre procesos: se vuelve a cargar solo cuando el JSON cambia."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.model = None
+        self._mtime = None
+
+    def get(self):
+        """Devuelve el modelo vigente (None si todavía no se ha entrenado ninguno)."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return self.model
+        if mtime != self._mtime:
+            model = PredictionModel.load(self.path)
+            if model is not None:
+                self.model = model
+                self._mtime = mtime
+        return self.model
+
+
+def train_model(data, epochs: int = 100, verbose: int = 0) -> tuple:
+    """Entrena la red de ``predictest_6`` con el historial (``TrainingData``).
+
+    Devuelve ``(PredictionModel, red de Keras)``.
+    """
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.models import Sequential
+
+    # Entradas: hora ocupación, duración, día semana
+    X = np.column_stack([data['hora'], data['duracion'], data['dia_semana']]).astype(np.float64)
+    y = data['space_id']
+
+    # Normalizar los datos (como MinMaxScaler)
+    data_min = X.min(axis=0)
+    rango = X.max(axis=0) - data_min
+    rango[rango == 0] = 1.0
+    X_scaled = (X - data_min) / rango
+
+    network = Sequential([
+        Dense(10, activation='relu', input_shape=(3,)),
+        Dense(10, activation='relu'),
+        Dense(1, activation='linear')  # Salida: Predicción del espacio libre
+    ])
+    network.compile(optimizer='adam', loss='mse', metrics=['mae'])
+    network.fit(X_scaled, y, epochs=epochs, verbose=verbose)
+
+    # Exportar la red a NumPy y comprobar que reproduce model.predict
+    runtime = DenseRuntime.from_keras(network, -data_min / rango, 1 / rango)
+    muestra = X[:1000]
+    esperado = network.predict(X_scaled[:1000].astype(np.float32), verbose=0)
+    if not np.allclose(runtime.predict(muestra), esperado, rtol=1e-4, atol=1e-3):
+        raise ValueError("La red exportada a NumPy no reproduce las predicciones de Keras")
+
+    # Evaluar la red una sola vez sobre todas las entradas posibles
+    tiempo_promedio = float(data['duracion'].mean())
+    dias, horas = np.meshgrid(np.arange(7), np.arange(24), indexing="ij")
+    grid = np.column_stack([horas.ravel(), np.full(dias.size, tiempo_promedio), dias.ravel()])
+    table = runtime.predict(grid)[:, 0].astype(np.int32).reshape(7, 24)  # int() trunca igual que antes
+
+    version = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    survival = DwellSurvivalModel.fit(data)
+    return PredictionModel(table, tiempo_promedio, version, runtime, survival), network
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Activaciones de Keras que se pueden reproducir en NumPy
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+}
+
+
+class DenseRuntime:
+    """Pasada hacia adelante en NumPy de una red Keras de capas ``Dense`` con su ``MinMaxScaler``.
+
+    Reproduce ``model.predict`` (en float32, igual que TensorFlow) sin importar
+    TensorFlow. ``predict`` recibe un lote ``(n, entradas)`` sin normalizar, así que
+    se pueden evaluar todos los espacios u horarios en una sola llamada. Los parámetros
+    del escalador son ``min_`` y ``scale_`` de ``MinMaxScaler``: ``X * scale + min``.
+    """
+
+    def __init__(self, weights: list, biases: list, activations: list, scaler_min=None, scaler_scale=None):
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f"Activaciones no soportadas: {sorted(unknown)}")
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        n_inputs = self.weights[0].shape[0]
+        self.scaler_min = np.zeros(n_inputs, np.float32) if scaler_min is None else np.asarray(scaler_min, np.float32)
+        self.scaler_scale = np.ones(n_inputs, np.float32) if scaler_scale is None else np.asarray(scaler_scale, np.float32)
+
+    @classmethod
+    def from_keras(cls, network, scaler_min=None, scaler_scale=None) -> "DenseRuntime":
+        """Toma los pesos de un modelo ``Sequential`` de capas ``Dense``."""
+        weights, biases, activations = [], [], []
+        for layer in network.layers:
+            if type(layer).__name__ != "Dense":
+                raise ValueError(f"Solo se pueden exportar capas Dense, no {type(layer).__name__}")
+            kernel, bias = layer.get_weights()
+            weights.append(kernel)
+            biases.append(bias)
+            activations.append(layer.get_config()["activation"])
+        return cls(weights, biases, activations, scaler_min, scaler_scale)
+
+    def predict(self, X) -> np.ndarray:
+        """Evalúa la red sobre un lote de entradas sin normalizar; devuelve ``(n, salidas)``."""
+        x = np.atleast_2d(np.asarray(X, dtype=np.float32)) * self.scaler_scale + self.scaler_min
+        for weight, bias, activation in zip(self.weights, self.biases, self.activations):
+            x = ACTIVATIONS[activation](x @ weight + bias)
+        return x
+
+    def to_arrays(self, prefix: str = "dense_") -> dict:
+        """Parámetros como arreglos con nombre, para guardarlos con ``np.savez``."""
+        arrays = {f"{prefix}activations": np.array(self.activations),
+                  f"{prefix}scaler_min": self.scaler_min,
+                  f"{prefix}scaler_scale": self.scaler_scale}
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"{prefix}W{i}"] = weight
+            arrays[f"{prefix}b{i}"] = bias
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str = "dense_") -> "DenseRuntime":
+        activations = [str(a) for a in arrays[f"{prefix}activations"]]
+        return cls([arrays[f"{prefix}W{i}"] for i in range(len(activations))],
+                   [arrays[f"{prefix}b{i}"] for i in range(len(activations))],
+                   activations, arrays[f"{prefix}scaler_min"], arrays[f"{prefix}scaler_scale"])
+
+    def save(self, path: str):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "DenseRuntime":
+        with np.load(path) as arrays:
+            return cls.from_arrays(arrays)
+
+
+def export_dense_model(network, path: str, scaler=None) -> DenseRuntime:
+    """Exporta un modelo Keras de capas ``Dense`` (y su ``MinMaxScaler``, si se da) a ``.npz``."""
+    runtime = DenseRuntime.from_keras(network,
+                                      scaler.min_ if scaler is not None else None,
+                                      scaler.scale_ if scaler is not None else None)
+    runtime.save(path)
+    return runtime
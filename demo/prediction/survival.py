@@ -0,0 +1,98 @@
+import datetime
+
+import numpy as np
+
+from .history import hour_and_weekday
+
+HOURS_PER_WEEK = 7 * 24
+
+
+class DwellSurvivalModel:
+    """Tiempo de permanencia por espacio y hora de la semana de llegada, como curva de supervivencia empírica.
+
+    Las duraciones del historial se agrupan en intervalos de ``step`` segundos hasta
+    ``horizon``. Para cada (espacio, hora de la semana) y cada intervalo ``k`` se
+    precalcula el tiempo restante esperado de un auto que ya lleva ``k * step``
+    segundos: E[D − t | D ≥ t]. Si un grupo tiene menos de ``min_count`` estadías
+    que superen ese tiempo se usa el del espacio completo y, si tampoco alcanza, el
+    de todo el estacionamiento. A un auto que ya superó todas las estadías
+    registradas (abandonado, o que pasó la noche) se le asigna la duración media del
+    grupo como tiempo restante, en lugar de cero, para que no aparezca como el
+    próximo en liberarse. Así, ordenar los espacios ocupados es un solo índice en
+    ``remaining``.
+    """
+
+    def __init__(self, remaining: np.ndarray, step: float):
+        self.remaining = np.asarray(remaining, dtype=np.float32)  # (espacios + 1, 168, intervalos); fila 0 = global
+        self.step = float(step)
+
+    @classmethod
+    def fit(cls, data, step: float = 600.0, horizon: float = 24 * 3600.0, min_count: int = 5) -> "DwellSurvivalModel":
+        """Construye las curvas con el historial (``TrainingData``)."""
+        n_bins = int(np.ceil(horizon / step))
+        spaces = data['space_id'].astype(np.int64)
+        n_spaces = int(spaces.max()) if len(spaces) else 0
+        how = data['dia_semana'].astype(np.int64) * 24 + data['hora']
+        bins = np.clip((data['duracion'] // step).astype(np.int64), 0, n_bins - 1)
+        durations = data['duracion']
+
+        # Conteos y suma de duraciones por (espacio, hora de la semana, intervalo)
+        shape = (n_spaces + 1, HOURS_PER_WEEK, n_bins)
+        flat = np.ravel_multi_index((spaces, how, bins), shape)
+        counts = np.bincount(flat, minlength=np.prod(shape)).reshape(shape).astype(np.float64)
+        totals = np.bincount(flat, weights=durations, minlength=np.prod(shape)).reshape(shape)
+
+        def expected_remaining(c, s):
+            # Sumas desde el intervalo k hasta el final: estadías que llegaron a k y su duración
+            survivors = np.flip(np.cumsum(np.flip(c, -1), -1), -1)
+            duration = np.flip(np.cumsum(np.flip(s, -1), -1), -1)
+            start = np.arange(n_bins) * step
+            with np.errstate(invalid="ignore", divide="ignore"):
+                remaining = np.maximum(duration / survivors - start, 0)
+                # Sin estadías tan largas: se supone que aún le queda la duración media del grupo
+                mean = duration[..., :1] / survivors[..., :1]
+            return np.where(survivors > 0, remaining, mean), survivors
+
+        bucket, bucket_n = expected_remaining(counts, totals)
+        space, space_n = expected_remaining(counts.sum(axis=1, keepdims=True), totals.sum(axis=1, keepdims=True))
+        glob_, glob_n = expected_remaining(counts.sum(axis=(0, 1), keepdims=True), totals.sum(axis=(0, 1), keepdims=True))
+
+        glob_ = np.nan_to_num(glob_)  # Historial vacío: todos los espacios iguales
+        remaining = np.broadcast_to(glob_, counts.shape)
+        for level, n in ((space, space_n), (bucket, bucket_n)):
+            # El grupo alcanza si tiene suficientes estadías en ese tiempo o, pasada la
+            # más larga, suficientes en total para que su media sea confiable
+            enough = (n >= min_count) | ((n == 0) & (n[..., :1] >= min_count))
+            remaining = np.where(enough, level, remaining)
+        remaining[0] = glob_[0]
+        return cls(remaining, step)
+
+    def expected_remaining(self, spaces: np.ndarray, arrivals: np.ndarray, now: datetime.datetime = None) -> np.ndarray:
+        """Segundos esperados hasta que se libere cada espacio, dado su momento de llegada."""
+        now = np.datetime64(datetime.datetime.now() if now is None else now, "s")
+        arrivals = np.asarray(arrivals, dtype="datetime64[s]")
+        hora, dia_semana = hour_and_weekday(arrivals)
+        elapsed = (now - arrivals).astype(np.int64)
+        bins = np.clip(elapsed // int(self.step), 0, self.remaining.shape[2] - 1)
+        rows = np.where(spaces < self.remaining.shape[0], spaces, 0)  # Espacios sin historial: curva global
+        return self.remaining[rows, dia_semana.astype(np.int64) * 24 + hora, bins]
+
+    def rank(self, espacios_ocupados: dict, now: datetime.datetime = None) -> list:
+        """Ordena los espacios ocupados ``{espacio: hora_llegada}`` por tiempo restante esperado.
+
+        Devuelve ``[(espacio, segundos), ...]`` empezando por el que se liberará primero.
+        """
+        if not espacios_ocupados:
+            return []
+        spaces = np.fromiter(espacios_ocupados.keys(), dtype=np.int64, count=len(espacios_ocupados))
+        arrivals = np.array(list(espacios_ocupados.values()), dtype="datetime64[s]")
+        remaining = self.expected_remaining(spaces, arrivals, now)
+        order = np.argsort(remaining, kind="stable")
+        return [(int(spaces[i]), float(remaining[i])) for i in order]
+
+    def to_arrays(self, prefix: str = "survival_") -> dict:
+        return {f"{prefix}remaining": self.remaining, f"{prefix}step": np.float64(self.step)}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str = "survival_") -> "DwellSurvivalModel":
+        return cls(arrays[f"{prefix}remaining"], float(arrays[f"{prefix}step"]))
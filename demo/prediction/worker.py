@@ -0,0 +1,93 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .history import DB_CONFIG, update_training_data
+from .model import PredictionModel, train_model
+
+
+class RetrainWorker:
+    """Reentrena el modelo de predicción en un hilo en segundo plano.
+
+    Al crearse carga el artefacto guardado en ``model_path`` (si existe), así que las
+    predicciones están disponibles de inmediato. Cada ``interval`` segundos, o al
+    llamar a ``retrain_now``, agrega a ``data_path`` los registros nuevos de la base de
+    datos, entrena con el historial completo, guarda el artefacto y
+    reemplaza ``self.model``; las predicciones en curso terminan con el modelo anterior.
+
+    El entrenamiento corre en un proceso aparte, así que el proceso web nunca importa
+    TensorFlow y la memoria del entrenamiento se libera al terminar.
+    """
+
+    def __init__(self, model_path: str, data_path: str, interval: float = 3600.0, db_config: dict = DB_CONFIG,
+                 epochs: int = 100, min_samples: int = 10):
+        self.model_path = model_path
+        self.data_path = data_path  # Características del historial ya leídas
+        self.interval = interval
+        self.db_config = db_config
+        self.epochs = epochs
+        self.min_samples = min_samples  # Registros mínimos para entrenar
+        self.model = PredictionModel.load(model_path)
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def retrain_now(self):
+        """Pide un reentrenamiento sin esperar al siguiente intervalo."""
+        self._wake.set()
+
+    def predict(self, now=None, espacios_ocupados=None):
+        """Predice con el modelo vigente; None si todavía no hay ninguno entrenado."""
+        model = self.model
+        return model.predict(now, espacios_ocupados) if model is not None else None
+
+    def _run(self):
+        """Bucle del hilo de reentrenamiento."""
+        if self.model is None:
+            self.retrain()  # Sin artefacto guardado: entrenar el primero cuanto antes
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            self.retrain()
+
+    def retrain(self) -> bool:
+        """Entrena un modelo nuevo, lo guarda y lo pone en uso; devuelve si se logró."""
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                trained = pool.submit(train_and_save, self.model_path, self.data_path, self.db_config,
+                                      self.epochs, self.min_samples).result()
+        except Exception as e:
+            print(f"Error al reentrenar el modelo de predicción: {e}")
+            return False
+        if not trained:
+            return False
+        model = PredictionModel.load(self.model_path)
+        if model is None:
+            return False
+        self.model = model
+        return True
+
+
+def train_and_save(model_path: str, data_path: str, db_config: dict = DB_CONFIG, epochs: int = 100,
+                   min_samples: int = 10) -> bool:
+    """Actualiza el historial, entrena con él y guarda el artefacto; devuelve si se logró."""
+    data = update_training_data(data_path, db_config)
+    if len(data) < min_samples:
+        print(f"Historial insuficiente para entrenar ({len(data)} registros).")
+        return False
+    model, network = train_model(data, epochs=epochs)
+    model.save(model_path, network)
+    print(f"Modelo de predicción {model.version} entrenado con {len(data)} registros.")
+    return True
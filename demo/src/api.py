@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from .dwell_stats import DwellStats
+from .snapshot import OccupancySnapshot
+
+
+class OccupancyRequestHandler(BaseHTTPRequestHandler):
+    """Atiende ``GET /spaces`` con el cuerpo ya serializado de la instantánea.
+
+    Con ``?since=<versión>`` solo se envían los espacios que cambiaron después de esa
+    versión. Si el cliente manda ``If-None-Match`` con la ETag vigente se responde 304
+    sin cuerpo. ``GET /events`` mantiene la conexión abierta: envía un evento
+    ``snapshot`` con el estado completo y luego un evento ``delta`` por cada versión
+    nueva, así que el tablero no necesita consultar periódicamente.
+    ``GET /dwell-stats?espacio=<n>&hora=<h>`` devuelve las estadísticas de permanencia
+    en línea (ambos parámetros son opcionales). Las respuestas permiten CORS para que
+    el tablero servido por Apache pueda consultar la API en otro puerto.
+    """
+
+    protocol_version = "HTTP/1.1"  # Conexiones persistentes para los tableros que consultan seguido
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._send_cors_headers()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/events":
+            self._stream_events()
+            return
+        if path == "/dwell-stats":
+            self._send_dwell_stats(query)
+            return
+        if path not in ("/spaces", "/get_spaces"):
+            self._send_error(404)
+            return
+
+        try:
+            since = parse_qs(query).get("since")
+            since = int(since[0]) if since else None
+        except ValueError:
+            self._send_error(400)
+            return
+
+        _, body, etag = self.server.snapshot.get(since)
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self._send_cors_headers()
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")  # Revalidar siempre con la ETag
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_dwell_stats(self, query: str):
+        if self.server.dwell_stats is None:
+            self._send_error(404)
+            return
+        try:
+            params = parse_qs(query)
+            espacio = int(params["espacio"][0]) if "espacio" in params else None
+            hora = int(params["hora"][0]) if "hora" in params else None
+        except ValueError:
+            self._send_error(400)
+            return
+        if (espacio is not None and espacio < 1) or (hora is not None and not 0 <= hora < 24):
+            self._send_error(400)
+            return
+
+        body = json.dumps(self.server.dwell_stats.summary(espacio, hora)).encode("utf-8")
+        self.send_response(200)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self):
+        """Envía la instantánea actual y luego cada versión nueva como eventos SSE."""
+        self.send_response(200)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")  # Sin búfer en un proxy inverso
+        self.end_headers()
+        self.close_connection = True
+
+        snapshot = self.server.snapshot
+        try:
+            version, body, _ = snapshot.get()
+            self.wfile.write(b"id: %d\nevent: snapshot\ndata: %s\n\n" % (version, body))
+            self.wfile.flush()
+            while not self.server.closing:
+                new_version = snapshot.wait_for_change(version, self.server.keepalive_interval)
+                if new_version == version:
+                    self.wfile.write(b": keepalive\n\n")  # Mantiene viva la conexión a través de proxies
+                else:
+                    version, body, _ = snapshot.get(since=version)
+                    self.wfile.write(b"id: %d\nevent: delta\ndata: %s\n\n" % (version, body))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # El navegador cerró la conexión
+
+    def _send_cors_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+
+    def _send_error(self, status: int):
+        self.send_response(status)
+        self._send_cors_headers()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass  # Cientos de pantallas consultando cada segundo llenarían la consola
+
+
+class OccupancyAPIServer(ThreadingHTTPServer):
+    """Servidor HTTP de la instantánea de ocupación, en un hilo propio del proceso del clasificador.
+
+    La predicción se toma de ``prediction_path`` (el mismo ``prediccion.txt`` que lee
+    ``get_spaces.php``): un hilo revisa su fecha de modificación cada
+    ``prediction_interval`` segundos y publica los cambios en la instantánea, lo que
+    también los envía a las conexiones de eventos.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, snapshot: OccupancySnapshot, host: str = "0.0.0.0", port: int = 8001,
+                 prediction_path: str = "prediccion.txt", prediction_interval: float = 1.0,
+                 keepalive_interval: float = 15.0, dwell_stats: DwellStats = None):
+        super().__init__((host, port), OccupancyRequestHandler)
+        self.snapshot = snapshot
+        self.prediction_path = prediction_path
+        self.prediction_interval = prediction_interval
+        self.keepalive_interval = keepalive_interval  # Segundos entre comentarios SSE sin cambios
+        self.dwell_stats = dwell_stats  # Estadísticas de permanencia para /dwell-stats (opcional)
+        self.closing = False
+        self._prediction_mtime = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def refresh_prediction(self):
+        """Recarga la predicción si el archivo cambió desde la última revisión."""
+        try:
+            mtime = os.stat(self.prediction_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._prediction_mtime:
+            return
+        try:
+            with open(self.prediction_path, "r", encoding="utf-8") as f:
+                self.snapshot.set_prediction(f.read().strip())
+            self._prediction_mtime = mtime
+        except OSError as e:
+            print(f"Error al leer la predicción de {self.prediction_path}: {e}")
+
+    def _watch_prediction(self):
+        while not self._stopped.wait(self.prediction_interval):
+            self.refresh_prediction()
+
+    def start(self):
+        """Atiende las consultas en un hilo en segundo plano."""
+        if self.prediction_path is not None:
+            self.refresh_prediction()
+            threading.Thread(target=self._watch_prediction, daemon=True).start()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"API de ocupación en http://{self.server_address[0]}:{self.server_address[1]}/spaces")
+        return self
+
+    def stop(self):
+        """Detiene el servidor y libera el puerto."""
+        self.closing = True  # Las conexiones de eventos terminan en su siguiente espera
+        self._stopped.set()
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.server_close()
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import cv2
+
+
+class CameraStream:
+    """Captura de una cámara en un hilo propio que siempre entrega el cuadro más reciente.
+
+    El hilo llama a ``grab()`` continuamente para que el búfer interno de OpenCV no
+    acumule cuadros viejos. En cuanto se entrega un cuadro decodifica con
+    ``retrieve()`` el siguiente que capture, de modo que la decodificación ocurre
+    mientras se procesa el anterior y ``read`` normalmente regresa de inmediato. Los
+    cuadros capturados mientras hay uno decodificado sin entregar se descartan sin
+    decodificar y se cuentan en ``dropped_frames``; si el pendiente tiene más de
+    ``max_age`` segundos se reemplaza por uno nuevo para no entregar imágenes viejas
+    y se cuenta en ``replaced_frames``.
+
+    Los cuadros decodificados se guardan en un anillo de ``buffer_size`` búferes que se
+    reutilizan. Nunca se decodifica en el búfer del último cuadro entregado ni en el
+    del pendiente, así que uno devuelto por ``read`` es válido hasta la siguiente
+    llamada a ``read``, suficiente para procesarlo y mostrarlo dentro del mismo ciclo.
+    """
+
+    def __init__(self, source, buffer_size: int = 3, max_age: float = 0.5):
+        self.cap = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self.buffer_size = max(buffer_size, 3)  # Entregado, pendiente y el que se decodifica
+        self.max_age = max_age  # Segundos que puede esperar un cuadro decodificado antes de reemplazarlo
+        self.grabbed_frames = 0  # Cuadros capturados por la cámara
+        self.delivered_frames = 0  # Cuadros entregados al clasificador
+        self.dropped_frames = 0  # Cuadros capturados que se descartaron sin decodificar
+        self.replaced_frames = 0  # Cuadros decodificados que se reemplazaron por viejos antes de entregarse
+
+        self._frames = [None] * self.buffer_size  # Anillo de búferes decodificados
+        self._slot = 0
+        self._latest = None  # Cuadro decodificado pendiente de entregar
+        self._latest_slot = None  # Búfer del cuadro pendiente
+        self._delivered_slot = None  # Búfer del último cuadro entregado por read
+        self._latest_time = 0.0  # Momento en que se decodificó
+        self._running = self.cap.isOpened()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        if self._running:
+            self._thread.start()
+
+    def isOpened(self) -> bool:
+        return self._running and self.cap.isOpened()
+
+    def _run(self):
+        """Bucle del hilo de captura."""
+        while self._running:
+            if not self.cap.grab():
+                break
+
+            with self._condition:
+                self.grabbed_frames += 1
+                pending = self._latest is not None and time.monotonic() - self._latest_time < self.max_age
+                if pending:
+                    self.dropped_frames += 1  # El cuadro anterior sigue sin entregarse: se descarta sin decodificar
+                    continue
+                slot = self._slot
+                while slot in (self._delivered_slot, self._latest_slot):
+                    slot = (slot + 1) % self.buffer_size
+
+            # Decodificar por adelantado en el siguiente búfer del anillo
+            ret, frame = self.cap.retrieve(self._frames[slot])
+            if not ret:
+                continue
+
+            with self._condition:
+                if self._latest is not None:
+                    self.replaced_frames += 1
+                self._frames[slot] = frame
+                self._slot = (slot + 1) % self.buffer_size
+                self._latest, self._latest_slot = frame, slot
+                self._latest_time = time.monotonic()
+                self._condition.notify_all()
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def read(self, timeout: float = None):
+        """Devuelve ``(ret, frame)`` como ``cv2.VideoCapture.read`` con el cuadro más reciente.
+
+        Espera al siguiente cuadro mientras el hilo de captura siga activo, así que
+        ``ret`` solo es False cuando la cámara dejó de entregar cuadros. Con ``timeout``
+        también puede devolver ``(False, None)`` si se agota; ``isOpened`` dice entonces
+        si vale la pena volver a intentarlo.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._latest is not None or not self._running, timeout)
+
+            frame, self._latest = self._latest, None
+            if frame is None:
+                return False, None
+            self._delivered_slot, self._latest_slot = self._latest_slot, None
+            self.delivered_frames += 1
+            return True, frame
+
+    def release(self):
+        """Detiene el hilo de captura y libera la cámara."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self.cap.release()
@@ -0,0 +1,191 @@
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+
+
+class ParkingEvent(NamedTuple):
+    """Transición de un espacio: "Ocupado" registra la llegada y "Libre" la salida.
+
+    ``event_id`` identifica el evento de forma única para que reenviarlo a la base de
+    datos (por ejemplo, al reproducir la bitácora) no lo duplique.
+    """
+    space_id: int
+    estado: str
+    timestamp: datetime
+    event_id: str = None
+
+    @classmethod
+    def create(cls, space_id: int, estado: str, timestamp: datetime) -> "ParkingEvent":
+        return cls(space_id, estado, timestamp, uuid.uuid4().hex)
+
+
+class _FlushRequest:
+    """Pide al hilo escritor que escriba el lote pendiente y avise al terminar."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()  # Marca para terminar el hilo escritor
+
+
+class AsyncParkingWriter:
+    """Escribe las transiciones en la base de datos desde un hilo en segundo plano.
+
+    El bucle de video solo encola eventos en una cola acotada. El hilo escritor los
+    agrupa y los manda en una sola transacción (``write_events`` del gestor de base de
+    datos) cuando el lote llega a ``batch_size`` eventos o pasan ``flush_interval``
+    segundos, lo que ocurra primero. ``metrics()`` expone la profundidad de la cola y
+    la latencia de las escrituras.
+
+    Con una ``EventJournal`` cada evento se agrega primero a la bitácora local. Si la
+    base de datos no responde (o la cola se llena) el escritor deja de usar la cola y,
+    en cada intervalo, reintenta enviar lo pendiente desde la bitácora en orden hasta
+    ponerse al día, así que una caída corta no pierde eventos.
+    """
+
+    def __init__(self, db_manager, max_queue: int = 10000, batch_size: int = 100,
+                 flush_interval: float = 1.0, put_timeout: float = 0.5, journal=None):
+        self.db_manager = db_manager
+        self.journal = journal
+        self.replaying = journal is not None and journal.has_pending()  # Enviar desde la bitácora
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self.events_written = 0
+        self.events_failed = 0  # Eventos de lotes que la base de datos rechazó
+        self.events_dropped = 0  # Eventos descartados porque la cola estaba llena
+        self.flush_count = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    def metrics(self) -> dict:
+        """Métricas del escritor para monitoreo."""
+        return {
+            "queue_depth": self.queue_depth,
+            "replaying": self.replaying,
+            "events_written": self.events_written,
+            "events_failed": self.events_failed,
+            "events_dropped": self.events_dropped,
+            "flush_count": self.flush_count,
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+            "avg_flush_latency": self.total_flush_latency / self.flush_count if self.flush_count else 0.0,
+        }
+
+    def submit(self, event: ParkingEvent) -> bool:
+        """Registra el evento en la bitácora (si hay) y lo encola.
+
+        Si la cola sigue llena tras ``put_timeout`` segundos el evento se descarta de la
+        cola; con bitácora se enviará luego desde ella.
+        """
+        position = self.journal.append(event) if self.journal is not None else None
+        try:
+            self.queue.put((event, position), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            if self.journal is not None:
+                self.replaying = True
+                return True
+            self.events_dropped += 1
+            print(f"Cola de escritura llena, se descartó el evento del espacio {event.space_id}.")
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a que se escriban todos los eventos encolados hasta ahora."""
+        request = _FlushRequest()
+        self.queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Escribe lo pendiente y detiene el hilo escritor."""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Bucle del hilo escritor."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                return
+            if isinstance(item, _FlushRequest):
+                self._write(batch)
+                batch = []
+                item.done.set()
+                continue
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch: list):
+        """Escribe un lote de ``(evento, posición)`` o, si hay pendientes, reproduce la bitácora."""
+        if self.replaying:
+            self._replay()  # Los eventos del lote también están en la bitácora
+            return
+        if self.journal is not None:
+            # Omitir lo que ya se envió al reproducir la bitácora
+            committed = self.journal.committed_position
+            batch = [(event, position) for event, position in batch if position > committed]
+        if not batch:
+            return
+
+        if self.journal is not None:
+            self.journal.sync()
+        if self._store([event for event, _ in batch]):
+            if self.journal is not None:
+                self.journal.commit(batch[-1][1])
+        elif self.journal is not None:
+            self.replaying = True
+
+    def _replay(self):
+        """Envía en orden los eventos pendientes de la bitácora hasta ponerse al día."""
+        self.journal.sync()
+        while True:
+            pending = self.journal.read_pending(self.batch_size)
+            if not pending:
+                self.replaying = False
+                return
+            if not self._store([event for event, _ in pending]):
+                return  # La base de datos sigue sin responder; se reintenta en el siguiente intervalo
+            self.journal.commit(pending[-1][1])
+
+    def _store(self, events: list) -> bool:
+        """Escribe los eventos en una sola transacción y actualiza las métricas."""
+        start = time.perf_counter()
+        ok = self.db_manager.write_events(events)
+        latency = time.perf_counter() - start
+
+        self.flush_count += 1
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self.total_flush_latency += latency
+        if ok:
+            self.events_written += len(events)
+        else:
+            self.events_failed += len(events)
+        return ok
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+
+class OccupancyDebouncer:
+    """Histéresis temporal del estado de cada espacio, guardada en arreglos NumPy.
+
+    Un espacio libre pasa a ocupado cuando su puntaje llega a ``enter_threshold`` y uno
+    ocupado vuelve a libre cuando baja de ``exit_threshold`` (menor o igual al de
+    entrada). Además, el nuevo estado debe mantenerse al menos ``min_dwell_frames``
+    cuadros seguidos y ``min_dwell_seconds`` segundos antes de aceptarse, así que las
+    personas que pasan o las sombras no generan transiciones.
+    """
+
+    def __init__(self, n_spaces: int, min_dwell_frames: int = 3, min_dwell_seconds: float = 0.0):
+        self.min_dwell_frames = min_dwell_frames
+        self.min_dwell_seconds = min_dwell_seconds
+        self.state = np.zeros(n_spaces, dtype=bool)  # Estado estable (True = ocupado)
+        self.pending_frames = np.zeros(n_spaces, dtype=np.int32)  # Cuadros seguidos con el estado contrario
+        self.pending_since = np.full(n_spaces, np.nan)  # Momento en que empezó el estado contrario
+
+    def update(self, scores: np.ndarray, enter_threshold, exit_threshold, now: float = None) -> np.ndarray:
+        """Actualiza el estado con los puntajes del cuadro y devuelve los índices que cambiaron.
+
+        Los umbrales pueden ser escalares o arreglos por espacio.
+        """
+        now = time.monotonic() if now is None else now
+
+        candidate = np.where(self.state, scores >= exit_threshold, scores >= enter_threshold)
+        differs = candidate != self.state
+
+        self.pending_frames = np.where(differs, self.pending_frames + 1, 0)
+        self.pending_since = np.where(differs, np.fmin(self.pending_since, now), np.nan)
+
+        stable = (differs
+                  & (self.pending_frames >= self.min_dwell_frames)
+                  & (now - self.pending_since >= self.min_dwell_seconds))
+        flipped = np.flatnonzero(stable)
+
+        self.state[flipped] = candidate[flipped]
+        self.pending_frames[flipped] = 0
+        self.pending_since[flipped] = np.nan
+        return flipped
+
+    def reset(self):
+        """Marca todos los espacios como libres y descarta los cambios pendientes."""
+        self.state[:] = False
+        self.pending_frames[:] = 0
+        self.pending_since[:] = np.nan
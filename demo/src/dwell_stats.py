@@ -0,0 +1,161 @@
+import math
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+
+class DwellStats:
+    """Estadísticas de permanencia actualizadas con cada salida, sin reentrenar.
+
+    Por cada (espacio, hora de llegada) se lleva el número de estadías, la media y la
+    suma de cuadrados de las diferencias (algoritmo de Welford) y un histograma de
+    cubetas logarítmicas al estilo DDSketch: la cubeta ``i`` cubre
+    ``(gamma^(i-1), gamma^i]`` segundos, así que cualquier cuantil tiene un error
+    relativo menor que ``relative_accuracy``. Los grupos se combinan al consultar, de
+    modo que también se puede preguntar por un espacio en todo el día, por una hora en
+    todo el estacionamiento o por el total.
+
+    Si se indica ``path`` se cargan al crear el objeto y un hilo propio las guarda
+    (comprimidas, de forma atómica) cada ``save_interval`` segundos si hubo salidas
+    nuevas, y una última vez en ``close``; así ``record``, que corre en el bucle de
+    video, nunca espera la compresión.
+    """
+
+    def __init__(self, n_spaces: int, path: str = None, save_interval: float = 60.0,
+                 relative_accuracy: float = 0.02, max_seconds: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        n_buckets = int(math.ceil(math.log(max_seconds) / math.log(self.gamma))) + 1
+        shape = (n_spaces + 1, 24)  # Fila = número de espacio (empiezan en 1), columna = hora de llegada
+        self.count = np.zeros(shape, np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.sketch = np.zeros(shape + (n_buckets,), np.uint32)
+        self.updated = None  # Hora de la última salida registrada
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Un solo guardado a la vez (hilo periódico y close)
+        self._dirty = False
+        self._stopped = threading.Event()
+        self._thread = None
+        if path is not None:
+            self._load(path)
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Bucle del hilo que guarda las estadísticas periódicamente."""
+        while not self._stopped.wait(self.save_interval):
+            self.save()
+
+    def _load(self, path: str):
+        try:
+            with np.load(path) as data:
+                if not np.isclose(float(data["gamma"]), self.gamma) or data["sketch"].shape[2] != self.sketch.shape[2]:
+                    print(f"Las estadísticas de {path} usan otra precisión; se empieza de cero.")
+                    return
+                self._grow(data["count"].shape[0] - 1)
+                rows = data["count"].shape[0]
+                self.count[:rows] = data["count"]
+                self.mean[:rows] = data["mean"]
+                self.m2[:rows] = data["m2"]
+                self.sketch[:rows] = data["sketch"]
+                updated = data["updated"].item()
+                self.updated = datetime.fromisoformat(updated) if updated else None
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"No se pudieron cargar las estadísticas de permanencia {path}: {e}")
+
+    def _grow(self, space_id: int):
+        rows = self.count.shape[0]
+        if space_id < rows:
+            return
+        extra = space_id + 1 - rows
+        self.count = np.pad(self.count, ((0, extra), (0, 0)))
+        self.mean = np.pad(self.mean, ((0, extra), (0, 0)))
+        self.m2 = np.pad(self.m2, ((0, extra), (0, 0)))
+        self.sketch = np.pad(self.sketch, ((0, extra), (0, 0), (0, 0)))
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= 1.0:
+            return 0
+        return min(int(math.ceil(math.log(seconds) / math.log(self.gamma))), self.sketch.shape[2] - 1)
+
+    def record(self, space_id: int, hora_llegada: datetime, hora_salida: datetime):
+        """Agrega la estadía que acaba de terminar en ``space_id``."""
+        duracion = (hora_salida - hora_llegada).total_seconds()
+        if duracion < 0:
+            return
+        hora = hora_llegada.hour
+        with self._lock:
+            self._grow(space_id)
+            n = self.count[space_id, hora] + 1
+            delta = duracion - self.mean[space_id, hora]
+            self.count[space_id, hora] = n
+            self.mean[space_id, hora] += delta / n
+            self.m2[space_id, hora] += delta * (duracion - self.mean[space_id, hora])
+            self.sketch[space_id, hora, self._bucket(duracion)] += 1
+            self.updated = hora_salida
+            self._dirty = True
+
+    def summary(self, space_id: int = None, hora: int = None, quantiles: tuple = (0.5, 0.9)) -> dict:
+        """Cantidad, media, desviación y cuantiles (segundos) de las estadías seleccionadas.
+
+        ``None`` en ``space_id`` u ``hora`` combina todos los espacios u horas.
+        """
+        rows = slice(1, None) if space_id is None else slice(space_id, space_id + 1)
+        cols = slice(None) if hora is None else slice(hora, hora + 1)
+        with self._lock:
+            count = self.count[rows, cols].ravel().astype(np.float64)
+            mean = self.mean[rows, cols].ravel()
+            m2 = self.m2[rows, cols].ravel()
+            histogram = self.sketch[rows, cols].reshape(-1, self.sketch.shape[2]).sum(axis=0, dtype=np.int64)
+
+        total = count.sum()
+        result = {"espacio": space_id, "hora": hora, "cantidad": int(total), "media": None,
+                  "desviacion": None, "cuantiles": {}}
+        if total == 0:
+            return result
+        # Combinación de grupos de Welford (Chan et al.)
+        media = float((count * mean).sum() / total)
+        m2_total = float(m2.sum() + (count * (mean - media) ** 2).sum())
+        result["media"] = media
+        result["desviacion"] = math.sqrt(m2_total / (total - 1)) if total > 1 else 0.0
+
+        acumulado = np.cumsum(histogram)
+        for q in quantiles:
+            i = int(np.searchsorted(acumulado, q * (total - 1), side="right"))
+            valor = 1.0 if i == 0 else 2 * self.gamma ** i / (self.gamma + 1)  # Centro relativo de la cubeta
+            result["cuantiles"][f"p{round(q * 100):g}"] = valor
+        return result
+
+    def save(self):
+        """Guarda las estadísticas si hubo salidas nuevas desde la última vez."""
+        if self.path is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                arrays = {"count": self.count.copy(), "mean": self.mean.copy(), "m2": self.m2.copy(),
+                          "sketch": self.sketch.copy(), "gamma": np.float64(self.gamma),
+                          "updated": np.str_(self.updated.isoformat() if self.updated else "")}
+                self._dirty = False
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.savez_compressed(f, **arrays)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                self._dirty = True
+                print(f"Error al guardar las estadísticas de permanencia: {e}")
+
+    def close(self):
+        """Detiene el hilo de guardado y guarda lo pendiente."""
+        self._stopped.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5.0)
+        self.save()
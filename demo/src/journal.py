@@ -0,0 +1,112 @@
+import os
+import threading
+from datetime import datetime
+
+from .db_writer import ParkingEvent
+
+
+class EventJournal:
+    """Bitácora local de solo escritura al final para las transiciones de estacionamiento.
+
+    Cada evento se agrega como una línea ``id<TAB>espacio<TAB>estado<TAB>hora`` antes de
+    intentar escribirlo en la base de datos. ``append`` solo escribe al sistema
+    operativo; ``sync`` hace el ``fsync`` y lo llama el escritor una vez por lote.
+
+    El archivo ``<path>.offset`` guarda hasta qué byte los eventos ya están en la base
+    de datos. ``read_pending`` devuelve los que faltan para volver a enviarlos cuando la
+    base de datos regresa; como cada evento tiene un id único, reenviar uno ya escrito
+    no tiene efecto. Cuando todo está confirmado y el archivo supera ``max_bytes`` se
+    vacía y empieza una nueva generación.
+
+    Las posiciones son tuplas ``(generación, byte final del evento)``.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 20):
+        self.path = path
+        self.checkpoint_path = path + ".offset"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        self._size = os.path.getsize(path)
+        self._dirty = False
+        self.generation, self.committed = self._read_checkpoint()
+        self.committed = min(self.committed, self._size)
+
+    def _read_checkpoint(self) -> tuple:
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                generation, committed = f.read().split()
+                return int(generation), int(committed)
+        except (FileNotFoundError, ValueError):
+            return 0, 0
+
+    def _write_checkpoint(self):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(f"{self.generation} {self.committed}")
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @property
+    def committed_position(self) -> tuple:
+        return self.generation, self.committed
+
+    def has_pending(self) -> bool:
+        return self.committed < self._size
+
+    def append(self, event: ParkingEvent) -> tuple:
+        """Agrega el evento al final de la bitácora y devuelve su posición."""
+        line = f"{event.event_id}\t{event.space_id}\t{event.estado}\t{event.timestamp.isoformat()}\n"
+        with self._lock:
+            self._file.write(line.encode("utf-8"))
+            self._file.flush()
+            self._size += len(line.encode("utf-8"))
+            self._dirty = True
+            return self.generation, self._size
+
+    def sync(self):
+        """Asegura en disco todo lo agregado hasta ahora."""
+        with self._lock:
+            if self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def read_pending(self, limit: int) -> list:
+        """Devuelve hasta ``limit`` eventos no confirmados como ``(evento, posición)``."""
+        pending = []
+        with open(self.path, "rb") as f:
+            f.seek(self.committed)
+            offset = self.committed
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Línea que se está escribiendo en este momento
+                offset += len(raw)
+                try:
+                    event_id, space_id, estado, timestamp = raw.decode("utf-8").rstrip("\n").split("\t")
+                    event = ParkingEvent(int(space_id), estado, datetime.fromisoformat(timestamp), event_id)
+                except ValueError:
+                    print(f"Línea inválida en la bitácora {self.path}: {raw!r}")
+                    continue
+                pending.append((event, (self.generation, offset)))
+                if len(pending) >= limit:
+                    break
+        return pending
+
+    def commit(self, position: tuple):
+        """Marca como escritos en la base de datos todos los eventos hasta ``position``."""
+        generation, offset = position
+        with self._lock:
+            if generation != self.generation or offset <= self.committed:
+                return
+            self.committed = offset
+            if self.committed >= self._size and self._size >= self.max_bytes:
+                # Todo está en la base de datos: vaciar el archivo y empezar otra generación
+                self._file.truncate(0)
+                self._size = 0
+                self.committed = 0
+                self.generation += 1
+            self._write_checkpoint()
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            self._file.close()
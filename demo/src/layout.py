@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+
+
+def rotated_space_corners(x: int, y: int, angle: float, width: int, height: int) -> np.ndarray:
+    """Devuelve las cuatro esquinas de un espacio rotado alrededor de su centro."""
+    center = (x + width // 2, y + height // 2)
+    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+
+    rect = np.array([
+        [x, y],
+        [x + width, y],
+        [x + width, y + height],
+        [x, y + height]
+    ], dtype=np.float32)
+
+    return cv2.transform(np.array([rect]), M)[0]
+
+
+class ParkingLayout:
+    """Geometría precompilada de los espacios para una resolución de cuadro.
+
+    Las posiciones no cambian mientras el programa corre, así que la rotación de
+    cada espacio se calcula una sola vez. Por espacio se guarda:
+
+    - ``polygons``: esquinas rotadas (int32) para dibujar.
+    - ``boxes``: caja envolvente ``(x0, y0, x1, y1)`` recortada al cuadro.
+    - ``masks``: máscara uint8 local a la caja (255 dentro del polígono).
+    - ``areas``: número de píxeles de la máscara.
+    - ``anchors``: posición del número del espacio.
+    """
+
+    def __init__(self, positions: list, frame_shape: tuple):
+        self.frame_shape = tuple(frame_shape[:2])
+        frame_height, frame_width = self.frame_shape
+
+        self.polygons = []
+        self.masks = []
+        self.anchors = []
+        self.boxes = np.zeros((len(positions), 4), dtype=np.int32)
+        self.areas = np.zeros(len(positions), dtype=np.int64)
+
+        for i, (x, y, angle, width, height) in enumerate(positions):
+            polygon = np.int32(rotated_space_corners(x, y, angle, width, height))
+            center = (x + width // 2, y + height // 2)
+
+            # Caja envolvente del polígono recortada a los límites del cuadro
+            x0 = min(max(int(polygon[:, 0].min()), 0), frame_width)
+            y0 = min(max(int(polygon[:, 1].min()), 0), frame_height)
+            x1 = max(min(int(polygon[:, 0].max()) + 1, frame_width), x0)
+            y1 = max(min(int(polygon[:, 1].max()) + 1, frame_height), y0)
+
+            # Máscara local: el polígono desplazado al origen de la caja
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            if mask.size:
+                cv2.fillPoly(mask, [polygon - np.int32([x0, y0])], 255)
+
+            self.polygons.append(polygon)
+            self.masks.append(mask)
+            self.anchors.append((int(center[0] - width // 4), int(center[1] + 5)))
+            self.boxes[i] = (x0, y0, x1, y1)
+            self.areas[i] = cv2.countNonZero(mask) if mask.size else 0
+
+    def __len__(self) -> int:
+        return len(self.polygons)
+
+    def padded_bounds(self, padding: int, indices=None) -> tuple:
+        """Región ``(x0, y0, x1, y1)`` que cubre los espacios (todos o solo ``indices``)
+        más ``padding`` píxeles, recortada al cuadro."""
+        frame_height, frame_width = self.frame_shape
+        boxes = self.boxes if indices is None else self.boxes[indices]
+        valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+        if not valid.any():
+            return (0, 0, 0, 0)
+        boxes = boxes[valid]
+        return (
+            max(int(boxes[:, 0].min()) - padding, 0),
+            max(int(boxes[:, 1].min()) - padding, 0),
+            min(int(boxes[:, 2].max()) + padding, frame_width),
+            min(int(boxes[:, 3].max()) + padding, frame_height),
+        )
+
+    def count_space(self, processed_image: np.ndarray, index: int) -> int:
+        """Cuenta los píxeles no nulos de un espacio mirando solo su caja envolvente."""
+        x0, y0, x1, y1 = self.boxes[index]
+        if x1 <= x0 or y1 <= y0:
+            return 0
+        roi = processed_image[y0:y1, x0:x1]
+        return cv2.countNonZero(cv2.bitwise_and(roi, self.masks[index]))
+
+    def count_spaces(self, processed_image: np.ndarray, indices) -> np.ndarray:
+        """Cuenta solo los espacios indicados (índices base 0)."""
+        return np.array([self.count_space(processed_image, i) for i in indices], dtype=np.int64)
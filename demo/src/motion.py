@@ -0,0 +1,99 @@
+import cv2
+import numpy as np
+
+from .layout import ParkingLayout
+
+
+class MotionGate:
+    """Detecta qué espacios cambiaron respecto a la última vez que se clasificaron.
+
+    Mantiene una referencia en escala de grises reducida ``scale`` veces. Por cuadro
+    calcula la diferencia absoluta con la referencia y la diferencia media dentro del
+    polígono de cada espacio (píxeles precalculados, como en ``OccupancyCounter``).
+    Los espacios cuya diferencia media supera ``noise_floor`` (niveles de gris) se
+    consideran cambiados, junto con sus vecinos a menos de ``padding`` píxeles (el
+    alcance de los filtros), cuyo conteo también depende de esos píxeles. La
+    diferencia se mide solo dentro del espacio: en una caja ampliada, o en la caja
+    envolvente de un espacio rotado, un auto de poco contraste queda diluido por
+    debajo del umbral. Tras reclasificarlos, ``accept`` actualiza la referencia solo en sus
+    cajas, de modo que los cambios lentos se acumulan hasta superar el umbral.
+    """
+
+    def __init__(self, layout: ParkingLayout, padding: int = 0, scale: int = 4, noise_floor: float = 6.0):
+        self.layout = layout
+        self.scale = scale
+        self.noise_floor = noise_floor
+
+        frame_height, frame_width = layout.frame_shape
+        self.small_size = (max(frame_width // scale, 1), max(frame_height // scale, 1))
+        small_width, small_height = self.small_size
+
+        # Cajas de los espacios en la imagen reducida (redondeando hacia afuera)
+        boxes = layout.boxes.astype(np.int64)
+        self.small_boxes = np.stack([
+            np.minimum(boxes[:, 0] // scale, small_width),
+            np.minimum(boxes[:, 1] // scale, small_height),
+            np.minimum(-(-boxes[:, 2] // scale), small_width),
+            np.minimum(-(-boxes[:, 3] // scale), small_height),
+        ], axis=1)
+
+        # Píxeles de cada polígono en la imagen reducida (con precisión de subpíxel)
+        indices, labels = [], []
+        mask = np.zeros((small_height, small_width), dtype=np.uint8)
+        for label, (polygon, (x0, y0, x1, y1)) in enumerate(zip(layout.polygons, self.small_boxes)):
+            cv2.fillPoly(mask, [np.int32(np.round(polygon * (16 / scale)))], 1, shift=4)
+            space_index = np.flatnonzero(mask)
+            if space_index.size == 0 and x1 > x0 and y1 > y0:
+                mask[y0:y1, x0:x1] = 1  # Espacio menor que un píxel reducido: se usa su caja
+                space_index = np.flatnonzero(mask)
+            indices.append(space_index)
+            labels.append(np.full(space_index.size, label, dtype=np.int32))
+            mask.fill(0)
+        self._pixel_index = np.concatenate(indices) if indices else np.empty(0, dtype=np.intp)
+        self._pixel_labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.int32)
+        self.space_areas = np.maximum(np.bincount(self._pixel_labels, minlength=len(layout)), 1)
+
+        # Vecinos: espacios cuya caja ampliada en ``padding`` se cruza con la caja de otro
+        boxes = np.stack([
+            np.maximum(boxes[:, 0] - padding, 0),
+            np.maximum(boxes[:, 1] - padding, 0),
+            np.minimum(boxes[:, 2] + padding, frame_width),
+            np.minimum(boxes[:, 3] + padding, frame_height),
+        ], axis=1)
+        self.neighbors = ((boxes[:, None, 0] < layout.boxes[None, :, 2])
+                          & (layout.boxes[None, :, 0] < boxes[:, None, 2])
+                          & (boxes[:, None, 1] < layout.boxes[None, :, 3])
+                          & (layout.boxes[None, :, 1] < boxes[:, None, 3]))
+
+        self.small_color = None
+        self.small = np.zeros((small_height, small_width), dtype=np.uint8)
+        self.reference = None
+        self.diff = np.zeros_like(self.small)
+
+    def changed_spaces(self, image: np.ndarray) -> np.ndarray:
+        """Devuelve un vector bool con los espacios que cambiaron (todos en el primer cuadro)."""
+        self.small_color = cv2.resize(image, self.small_size, dst=self.small_color, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small_color, cv2.COLOR_BGR2GRAY, dst=self.small)
+
+        if self.reference is None:
+            self.reference = self.small.copy()
+            return np.ones(len(self.layout), dtype=bool)
+
+        cv2.absdiff(self.small, self.reference, dst=self.diff)
+
+        # Suma de la diferencia dentro de cada espacio en una sola pasada
+        sums = np.bincount(self._pixel_labels, weights=self.diff.ravel()[self._pixel_index],
+                           minlength=len(self.layout))
+        changed = sums > self.noise_floor * self.space_areas
+        if not changed.any():
+            return changed
+        return self.neighbors[changed].any(axis=0)
+
+    def accept_all(self):
+        """Toma el cuadro actual como referencia completa (tras una clasificación completa)."""
+        np.copyto(self.reference, self.small)
+
+    def accept(self, indices):
+        """Toma el cuadro actual como referencia en las cajas de los espacios reclasificados."""
+        for x0, y0, x1, y1 in self.small_boxes[indices]:
+            self.reference[y0:y1, x0:x1] = self.small[y0:y1, x0:x1]
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .layout import ParkingLayout
+
+
+class OccupancyCounter:
+    """Cuenta los píxeles no nulos de todos los espacios en una sola pasada por cuadro.
+
+    Los píxeles de los polígonos de un ``ParkingLayout`` se calculan una sola vez,
+    como índices del cuadro con la etiqueta de su espacio (i = espacio i). En cada
+    cuadro basta con leer esos píxeles y hacer un ``np.bincount``, así que el costo
+    ya no crece con el número de espacios.
+    """
+
+    def __init__(self, layout: ParkingLayout):
+        self.layout = layout
+        width = layout.frame_shape[1]
+
+        # Los espacios pueden solaparse algunos píxeles; se guarda cada píxel una vez
+        # por espacio para que los conteos coincidan con el cálculo por máscara.
+        indices, labels = [], []
+        for label, (mask, (x0, y0, _, _)) in enumerate(zip(layout.masks, layout.boxes), start=1):
+            ys, xs = np.nonzero(mask)
+            space_index = (ys + y0) * width + (xs + x0)
+            indices.append(space_index)
+            labels.append(np.full(space_index.size, label, dtype=np.int32))
+
+        self._pixel_index = np.concatenate(indices) if indices else np.empty(0, dtype=np.intp)
+        self._pixel_labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.int32)
+
+    def count(self, processed_image: np.ndarray) -> np.ndarray:
+        """Devuelve el número de píxeles no nulos de cada espacio, en el orden de positions.json."""
+        active = processed_image.ravel()[self._pixel_index] != 0
+        return np.bincount(self._pixel_labels[active], minlength=len(self.layout) + 1)[1:]
+
+
+@dataclass
+class OccupancyResult:
+    """Resultado compacto de una clasificación, independiente del dibujo.
+
+    - ``occupied``: vector bool con el estado de cada espacio.
+    - ``counts``: píxeles no nulos de cada espacio.
+    - ``ratios``: fracción del área de cada espacio con píxeles no nulos (float32).
+    - ``confidence``: qué tan lejos está cada razón de su umbral, entre 0 y 1 (float32).
+    - ``transitions``: ``(idx, estado, hora)`` ocurridas desde la llamada anterior.
+    """
+    occupied: np.ndarray
+    counts: np.ndarray
+    ratios: np.ndarray
+    confidence: np.ndarray
+    transitions: list
+
+    @property
+    def free_count(self) -> int:
+        return int(self.occupied.size - np.count_nonzero(self.occupied))
+
+
+def occupancy_ratios(counts: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    """Píxeles no nulos divididos por el área de la máscara de cada espacio."""
+    return (counts / np.maximum(areas, 1)).astype(np.float32)
+
+
+def ratio_thresholds(threshold: float, areas: np.ndarray, space_thresholds: np.ndarray) -> np.ndarray:
+    """Umbral de razón por espacio.
+
+    Usa el umbral propio del espacio si está definido en positions.json y, si no,
+    el equivalente del umbral absoluto ``threshold`` (píxeles) para su área.
+    """
+    default = threshold / np.maximum(areas, 1)
+    return np.where(np.isnan(space_thresholds), default, space_thresholds).astype(np.float32)
+
+
+def occupancy_confidence(ratios: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Distancia relativa de cada razón a su umbral, recortada a [0, 1]."""
+    distance = np.abs(ratios - thresholds) / np.maximum(thresholds, np.float32(1e-6))
+    return np.minimum(distance, 1).astype(np.float32)
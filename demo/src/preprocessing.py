@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+
+class FramePreprocessor:
+    """Cadena de preprocesamiento (gris, desenfoque, umbral adaptativo, mediana y dilatación)
+    que escribe en búferes reutilizables.
+
+    Los búferes intermedios se reservan una sola vez por resolución y OpenCV escribe
+    en ellos mediante ``dst=``; solo se vuelven a reservar si cambia el tamaño del
+    cuadro. ``last_allocated_bytes`` indica cuántos bytes reservó la última llamada
+    (0 en régimen estable) y ``total_allocated_bytes`` el acumulado.
+
+    Con ``roi`` solo se procesa esa región del cuadro (por ejemplo, la zona que cubre
+    todos los espacios); el resto del resultado conserva lo que tenía (ceros si nunca
+    se procesó). Para que los conteos no cambien, la región debe incluir ``PADDING``
+    píxeles alrededor de los espacios.
+
+    La imagen devuelta es un búfer interno que se sobrescribe en el siguiente cuadro;
+    hay que copiarla si se necesita conservarla.
+    """
+
+    BUFFER_NAMES = ("gray", "blur", "thresholded", "median", "dilated")
+
+    # Radio de influencia de toda la cadena: desenfoque 5x5, bloque 19x19 del umbral
+    # adaptativo, mediana 3x3 y dos iteraciones de dilatación con kernel 2x2.
+    PADDING = 5 // 2 + 19 // 2 + 3 // 2 + 2 * (2 - 1)
+
+    def __init__(self):
+        self.kernel = np.ones((2, 2), np.uint8)  # Reducido para mejor detección
+        self.frame_shape = None
+        self.last_allocated_bytes = 0
+        self.total_allocated_bytes = 0
+        for name in self.BUFFER_NAMES:
+            setattr(self, name, None)
+
+    def _allocate(self, frame_shape: tuple) -> int:
+        """Reserva los búferes intermedios para la resolución indicada y devuelve los bytes reservados."""
+        height, width = frame_shape[:2]
+        allocated = 0
+        for name in self.BUFFER_NAMES:
+            buffer = np.zeros((height, width), dtype=np.uint8)
+            setattr(self, name, buffer)
+            allocated += buffer.nbytes
+        self.frame_shape = tuple(frame_shape)
+        return allocated
+
+    def _keep(self, buffer: np.ndarray, output: np.ndarray) -> int:
+        """Copia la salida de OpenCV al búfer si no pudo escribir en él y devuelve los bytes nuevos."""
+        if output is buffer:
+            return 0
+        np.copyto(buffer, output)
+        return output.nbytes
+
+    def process(self, image: np.ndarray, roi: tuple = None) -> np.ndarray:
+        """Procesa la imagen (o solo la región ``(x0, y0, x1, y1)``) para preparar la clasificación."""
+        allocated = 0
+        if self.frame_shape != image.shape:
+            allocated += self._allocate(image.shape)
+
+        x0, y0, x1, y1 = roi if roi is not None else (0, 0, image.shape[1], image.shape[0])
+        height, width = y1 - y0, x1 - x0
+        if height <= 0 or width <= 0:
+            self.last_allocated_bytes = allocated
+            self.total_allocated_bytes += allocated
+            return self.dilated
+
+        # Vistas de los búferes con el tamaño de la región; el resultado va en su lugar del cuadro
+        gray = self.gray[:height, :width]
+        blur = self.blur[:height, :width]
+        thresholded = self.thresholded[:height, :width]
+        median = self.median[:height, :width]
+        dilated = self.dilated[y0:y1, x0:x1]
+
+        allocated += self._keep(gray, cv2.cvtColor(image[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY, dst=gray))
+        allocated += self._keep(blur, cv2.GaussianBlur(gray, (5, 5), 1, dst=blur))  # Ajustar para imágenes pequeñas
+        allocated += self._keep(thresholded, cv2.adaptiveThreshold(
+            blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 19, 9, dst=thresholded))
+        allocated += self._keep(median, cv2.medianBlur(thresholded, 3, dst=median))
+        allocated += self._keep(dilated, cv2.dilate(median, self.kernel, dst=dilated, iterations=2))  # Iteraciones ajustadas
+
+        self.last_allocated_bytes = allocated
+        self.total_allocated_bytes += allocated
+        return self.dilated
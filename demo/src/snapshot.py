@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+
+class OccupancySnapshot:
+    """Estado actual de los espacios, listo para servirse por HTTP.
+
+    El clasificador llama a ``update`` con sus transiciones y el cuerpo JSON (con la
+    misma forma que ``get_spaces.php`` más ``version`` y ``full``, y por espacio
+    ``fecha_cambio`` con la fecha y hora completas del último cambio) se serializa una
+    sola vez por cambio junto con su ETag. Las consultas solo leen el último cuerpo
+    armado, sin tocar la base de datos ni el disco, y las conexiones de eventos
+    esperan en ``wait_for_change`` hasta que haya una versión nueva.
+
+    ``version`` crece con cada cambio y arranca en los milisegundos de la hora de
+    inicio, así que sigue creciendo aunque el proceso se reinicie. ``get(since)``
+    devuelve solo los espacios que cambiaron después de ``since``; las respuestas
+    parciales se guardan hasta el siguiente cambio porque los tableros al día piden
+    todos la misma.
+    """
+
+    MAX_CACHED_DELTAS = 64
+
+    def __init__(self, n_spaces: int, prediction: str = "Sin datos de predicción"):
+        self._lock = threading.Condition()
+        self.version = time.time_ns() // 1_000_000  # Aumenta con cada cambio de estado o de predicción
+        self.prediction = prediction
+        self.rows = {}  # Espacio -> fila del JSON
+        self.changed = {}  # Espacio -> versión de su último cambio
+        self.libres = 0
+        # Hasta el primer cambio los espacios se muestran libres y sin hora registrada
+        for idx in range(1, n_spaces + 1):
+            self._set_row(idx, "Libre", None)
+        self._deltas = {}  # since -> (versión, cuerpo, ETag) de la versión vigente
+        self._full = self._serialize(None)
+
+    def _set_row(self, idx: int, estado: str, timestamp):
+        if isinstance(timestamp, datetime):
+            hora, fecha_cambio = timestamp.strftime("%H:%M:%S"), timestamp.isoformat()
+        else:
+            hora, fecha_cambio = ("N/A" if timestamp is None else str(timestamp)), None
+        previous = self.rows.get(idx)
+        if previous is not None:
+            self.libres -= previous["estado"] == "Libre"
+        self.rows[idx] = {
+            "parking_spaces_id_sd": idx,
+            "estado": estado,
+            "hora_cambio": hora,
+            "fecha_cambio": fecha_cambio,
+            "descripcion_estado": "Hora desde que se desocupó" if estado == "Libre" else "Hora desde que se ocupó",
+        }
+        self.libres += estado == "Libre"
+        self.changed[idx] = self.version
+
+    def update(self, transitions: list):
+        """Aplica transiciones ``(espacio, estado, hora)`` y vuelve a serializar."""
+        if not transitions:
+            return
+        with self._lock:
+            self.version += 1
+            for idx, estado, timestamp in transitions:
+                self._set_row(idx, estado, timestamp)
+            self._publish()
+
+    def set_prediction(self, prediction: str):
+        with self._lock:
+            if prediction == self.prediction:
+                return
+            self.version += 1
+            self.prediction = prediction
+            self._publish()
+
+    def _publish(self):
+        """Serializa la nueva versión y despierta a quienes esperan un cambio (con el candado tomado)."""
+        self._deltas.clear()
+        self._full = self._serialize(None)
+        self._lock.notify_all()
+
+    def get(self, since: int = None) -> tuple:
+        """Devuelve ``(versión, cuerpo JSON en bytes, ETag)``: completo, o solo lo cambiado después de ``since``.
+
+        Si ``since`` es posterior a la versión vigente (de otro proceso, por ejemplo) la
+        respuesta es completa.
+        """
+        with self._lock:
+            if since is None or since > self.version:
+                return self._full
+            cached = self._deltas.get(since)
+            if cached is None:
+                cached = self._serialize(since)
+                if len(self._deltas) < self.MAX_CACHED_DELTAS:
+                    self._deltas[since] = cached
+            return cached
+
+    def wait_for_change(self, version: int, timeout: float = None) -> int:
+        """Espera una versión distinta de ``version`` y la devuelve.
+
+        Si se agota ``timeout`` devuelve la versión vigente, que puede ser la misma.
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def _serialize(self, since) -> tuple:
+        if since is None:
+            spaces = [self.rows[idx] for idx in sorted(self.rows)]
+        else:
+            spaces = [self.rows[idx] for idx in sorted(self.rows) if self.changed[idx] > since]
+        body = json.dumps({
+            "version": self.version,
+            "full": since is None,
+            "spaces": spaces,
+            "libres": self.libres,
+            "ocupados": len(self.rows) - self.libres,
+            "total": len(self.rows),
+            "prediccion": self.prediction,
+        }, ensure_ascii=False).encode("utf-8")
+        # La ETag depende del contenido: sigue siendo válida aunque el proceso se reinicie
+        return self.version, body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
@@ -0,0 +1,238 @@
+import itertools
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+
+def group_events(events: list):
+    """Agrupa las transiciones consecutivas del mismo estado, respetando el orden del lote."""
+    for estado, group in itertools.groupby(events, key=lambda event: event.estado):
+        yield estado, list(group)
+
+
+def pending_events(events: list, applied_ids) -> list:
+    """Descarta los eventos cuyo ``event_id`` ya se aplicó o se repite dentro del lote.
+
+    Los eventos sin id (creados antes de la bitácora) siempre se escriben.
+    """
+    seen = set(applied_ids)
+    pending = []
+    for event in events:
+        if event.event_id is not None:
+            if event.event_id in seen:
+                continue
+            seen.add(event.event_id)
+        pending.append(event)
+    return pending
+
+
+def event_ids(events: list) -> list:
+    return [event.event_id for event in events if event.event_id is not None]
+
+
+def latest_by_space(events: list) -> list:
+    """Último evento de cada espacio dentro del lote, para actualizar current_state."""
+    return list({event.space_id: event for event in events}.values())
+
+
+class ParkingStorage(ABC):
+    """Interfaz de almacenamiento de las tablas parking_records, state_date y current_state.
+
+    current_state tiene una fila por espacio con su último cambio de estado; se
+    actualiza junto con state_date para que el tablero no tenga que agrupar el
+    historial en cada consulta.
+
+    ``ParkingDatabaseManager`` (MySQL) y ``SQLiteParkingStorage`` la implementan, de
+    modo que el clasificador y el escritor en segundo plano no dependen del motor.
+    """
+
+    @abstractmethod
+    def insert_parking_record(self, parking_spaces_id, hora_llegada):
+        """Inserta un registro de entrada en parking_records."""
+
+    @abstractmethod
+    def update_parking_record(self, parking_spaces_id, hora_salida):
+        """Completa el registro abierto del espacio con la hora de salida y la duración."""
+
+    @abstractmethod
+    def update_space_status(self, parking_spaces_id, estado):
+        """Inserta el cambio de estado del espacio en state_date."""
+
+    @abstractmethod
+    def write_events(self, events: list) -> bool:
+        """Escribe un lote de ``ParkingEvent`` en una sola transacción; devuelve si se logró.
+
+        Debe ser idempotente: los eventos cuyo ``event_id`` ya se aplicó se ignoran, así
+        que reenviar un lote tras una caída no duplica registros.
+        """
+
+    @abstractmethod
+    def close_connection(self):
+        """Libera las conexiones del almacenamiento."""
+
+
+def _to_text(value: datetime) -> str:
+    return value.isoformat(sep=" ", timespec="seconds")
+
+
+def _timediff(end: str, start: str):
+    """Equivalente de TIMEDIFF de MySQL para SQLite ('HH:MM:SS')."""
+    if end is None or start is None:
+        return None
+    seconds = int((datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds())
+    sign = "-" if seconds < 0 else ""
+    seconds = abs(seconds)
+    return f"{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class SQLiteParkingStorage(ParkingStorage):
+    """Almacenamiento embebido en SQLite, para correr en la misma máquina de la cámara o en CI.
+
+    Usa el modo WAL (las lecturas no bloquean la escritura) con ``synchronous=NORMAL``
+    y escribe cada lote en una sola transacción. Las tablas tienen las mismas columnas
+    que en MySQL, así que las consultas de los predictores funcionan igual.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS parking_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            parking_spaces_id INTEGER NOT NULL,
+            hora_llegada TEXT,
+            hora_salida TEXT,
+            duracion TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_parking_records_open
+            ON parking_records (parking_spaces_id, hora_salida);
+        CREATE TABLE IF NOT EXISTS state_date (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            parking_spaces_id_sd INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            hora_cambio TEXT NOT NULL,
+            UNIQUE (parking_spaces_id_sd, fecha, hora_cambio)
+        );
+        CREATE TABLE IF NOT EXISTS current_state (
+            parking_spaces_id_sd INTEGER PRIMARY KEY,
+            fecha TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            hora_cambio TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS parking_events (
+            event_id TEXT PRIMARY KEY,
+            aplicado TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+    """
+    INSERT_RECORD_QUERY = "INSERT INTO parking_records (parking_spaces_id, hora_llegada) VALUES (?, ?)"
+    UPDATE_RECORD_QUERY = """
+        UPDATE parking_records
+        SET hora_salida = ?, duracion = TIMEDIFF(?, hora_llegada)
+        WHERE parking_spaces_id = ? AND hora_salida IS NULL
+    """
+    INSERT_STATE_QUERY = """
+        INSERT OR IGNORE INTO state_date (parking_spaces_id_sd, fecha, estado, hora_cambio)
+        VALUES (?, ?, ?, ?)
+    """
+    UPSERT_CURRENT_STATE_QUERY = """
+        INSERT INTO current_state (parking_spaces_id_sd, fecha, estado, hora_cambio)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (parking_spaces_id_sd) DO UPDATE
+        SET fecha = excluded.fecha, estado = excluded.estado, hora_cambio = excluded.hora_cambio
+    """
+    SEED_CURRENT_STATE_QUERY = """
+        INSERT OR IGNORE INTO current_state (parking_spaces_id_sd, fecha, estado, hora_cambio)
+        SELECT sd.parking_spaces_id_sd, sd.fecha, sd.estado, sd.hora_cambio
+        FROM state_date sd
+        INNER JOIN (
+            SELECT parking_spaces_id_sd, MAX(fecha || ' ' || hora_cambio) AS ultimo
+            FROM state_date
+            GROUP BY parking_spaces_id_sd
+        ) latest
+        ON sd.parking_spaces_id_sd = latest.parking_spaces_id_sd
+        AND sd.fecha || ' ' || sd.hora_cambio = latest.ultimo
+    """
+    INSERT_EVENT_QUERY = "INSERT INTO parking_events (event_id) VALUES (?)"
+
+    def __init__(self, path: str = "car_parking.db"):
+        self.path = path
+        self._lock = threading.Lock()  # El escritor en segundo plano comparte la conexión
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.create_function("TIMEDIFF", 2, _timediff, deterministic=True)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        with self.connection:
+            if self.connection.execute("SELECT 1 FROM current_state LIMIT 1").fetchone() is None:
+                # Tabla recién creada: tomar el último estado de cada espacio del historial
+                self.connection.execute(self.SEED_CURRENT_STATE_QUERY)
+
+    def close_connection(self):
+        with self._lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def insert_parking_record(self, parking_spaces_id, hora_llegada):
+        try:
+            with self._lock, self.connection:
+                self.connection.execute(self.INSERT_RECORD_QUERY, (parking_spaces_id, _to_text(hora_llegada)))
+        except sqlite3.Error as e:
+            print(f"Error al insertar registro de entrada en SQLite: {e}")
+
+    def update_parking_record(self, parking_spaces_id, hora_salida):
+        hora_salida = _to_text(hora_salida)
+        try:
+            with self._lock, self.connection:
+                self.connection.execute(self.UPDATE_RECORD_QUERY, (hora_salida, hora_salida, parking_spaces_id))
+        except sqlite3.Error as e:
+            print(f"Error al actualizar registro en SQLite: {e}")
+
+    def update_space_status(self, parking_spaces_id, estado):
+        ahora = datetime.now()
+        row = (parking_spaces_id, ahora.date().isoformat(), estado, ahora.time().isoformat(timespec="seconds"))
+        try:
+            with self._lock, self.connection:
+                self.connection.execute(self.INSERT_STATE_QUERY, row)
+                self.connection.execute(self.UPSERT_CURRENT_STATE_QUERY, row)
+        except sqlite3.Error as e:
+            print(f"Error al actualizar el estado del espacio en SQLite: {e}")
+
+    def _applied_ids(self, ids: list) -> list:
+        """Ids del lote que ya están en parking_events."""
+        applied = []
+        for start in range(0, len(ids), 500):  # Límite de parámetros de SQLite
+            chunk = ids[start:start + 500]
+            applied.extend(row[0] for row in self.connection.execute(
+                f"SELECT event_id FROM parking_events WHERE event_id IN ({', '.join('?' * len(chunk))})", chunk))
+        return applied
+
+    def write_events(self, events: list) -> bool:
+        try:
+            with self._lock, self.connection:
+                events = pending_events(events, self._applied_ids(event_ids(events)))
+                if not events:
+                    return True
+                for estado, group in group_events(events):
+                    if estado == "Ocupado":
+                        self.connection.executemany(self.INSERT_RECORD_QUERY, [
+                            (event.space_id, _to_text(event.timestamp)) for event in group])
+                    else:
+                        self.connection.executemany(self.UPDATE_RECORD_QUERY, [
+                            (_to_text(event.timestamp), _to_text(event.timestamp), event.space_id)
+                            for event in group])
+
+                self.connection.executemany(self.INSERT_STATE_QUERY, [
+                    (event.space_id, event.timestamp.date().isoformat(), event.estado,
+                     event.timestamp.time().isoformat(timespec="seconds"))
+                    for event in events
+                ])
+                self.connection.executemany(self.UPSERT_CURRENT_STATE_QUERY, [
+                    (event.space_id, event.timestamp.date().isoformat(), event.estado,
+                     event.timestamp.time().isoformat(timespec="seconds"))
+                    for event in latest_by_space(events)
+                ])
+                self.connection.executemany(self.INSERT_EVENT_QUERY, [(event_id,) for event_id in event_ids(events)])
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al escribir {len(events)} eventos en SQLite: {e}")
+            return False
@@ -1,44 +1,259 @@
 import json
+import threading
 import cv2
 import numpy as np
 import mysql.connector
+from contextlib import closing, contextmanager
+from mysql.connector import pooling
 from datetime import datetime, timedelta
+from .db_writer import AsyncParkingWriter, ParkingEvent
+from .debounce import OccupancyDebouncer
+from .dwell_stats import DwellStats
+from .layout import ParkingLayout
+from .motion import MotionGate
+from .occupancy import (OccupancyCounter, OccupancyResult, occupancy_confidence, occupancy_ratios,
+                        ratio_thresholds)
+from .preprocessing import FramePreprocessor
+from .snapshot import OccupancySnapshot
+from .journal import EventJournal
+from .storage import ParkingStorage, event_ids, group_events, latest_by_space, pending_events
 
 
-class ParkingDatabaseManager:
-    """Clase para manejar la conexión y las operaciones con la base de datos MySQL."""
+class ParkingDatabaseManager(ParkingStorage):
+    """Clase para manejar las conexiones y las operaciones con la base de datos MySQL.
 
-    def __init__(self, host, user, password, database):
-        """Inicializa la conexión a la base de datos."""
+    Las conexiones salen de un pool compartido por todos los gestores del proceso con
+    la misma configuración, así que varias cámaras usan unas pocas conexiones. Cada
+    operación toma una conexión, comprueba que siga viva (reconectando si hace falta)
+    y la devuelve al terminar; si todas están en uso espera hasta ``pool_timeout``
+    segundos a que se libere una, porque el pool de mysql-connector falla en vez de
+    esperar. Las sentencias de una fila usan cursores preparados que se reutilizan
+    mientras dure la sesión de la conexión; el resto de cursores se cierra al
+    terminar cada operación.
+
+    La tabla parking_events guarda el id de cada evento ya escrito por ``write_events``
+    para que reenviar un lote (al reproducir la bitácora) no duplique registros, y
+    current_state guarda el último estado de cada espacio para el tablero.
+    """
+
+    EVENTS_TABLE_QUERY = """
+        CREATE TABLE IF NOT EXISTS parking_events (
+            event_id CHAR(32) PRIMARY KEY,
+            aplicado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+    INSERT_EVENT_QUERY = "INSERT INTO parking_events (event_id) VALUES (%s)"
+    CURRENT_STATE_TABLE_QUERY = """
+        CREATE TABLE IF NOT EXISTS current_state (
+            parking_spaces_id_sd INT PRIMARY KEY,
+            fecha DATE NOT NULL,
+            estado VARCHAR(20) NOT NULL,
+            hora_cambio TIME NOT NULL
+        )
+    """
+    UPSERT_CURRENT_STATE_QUERY = """
+        INSERT INTO current_state (parking_spaces_id_sd, fecha, estado, hora_cambio)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            fecha = VALUES(fecha), estado = VALUES(estado), hora_cambio = VALUES(hora_cambio)
+    """
+    SEED_CURRENT_STATE_QUERY = """
+        INSERT IGNORE INTO current_state (parking_spaces_id_sd, fecha, estado, hora_cambio)
+        SELECT sd.parking_spaces_id_sd, sd.fecha, sd.estado, sd.hora_cambio
+        FROM state_date sd
+        INNER JOIN (
+            SELECT parking_spaces_id_sd, MAX(TIMESTAMP(fecha, hora_cambio)) AS ultimo
+            FROM state_date
+            GROUP BY parking_spaces_id_sd
+        ) latest
+        ON sd.parking_spaces_id_sd = latest.parking_spaces_id_sd
+        AND TIMESTAMP(sd.fecha, sd.hora_cambio) = latest.ultimo
+    """
+
+    INSERT_RECORD_QUERY = """
+        INSERT INTO parking_records (parking_spaces_id, hora_llegada)
+        VALUES (%s, %s)
+    """
+    UPDATE_RECORD_QUERY = """
+        UPDATE parking_records
+        SET hora_salida = %s, duracion = TIMEDIFF(%s, hora_llegada)
+        WHERE parking_spaces_id = %s AND hora_salida IS NULL
+    """
+    INSERT_STATE_QUERY = """
+        INSERT IGNORE INTO state_date (parking_spaces_id_sd, fecha, estado, hora_cambio)
+        VALUES (%s, %s, %s, %s)
+    """
+
+    _pools = {}  # Pools compartidos: clave de configuración -> [pool, gestores que lo usan, conexiones libres]
+    _pools_lock = threading.Lock()
+
+    def __init__(self, host, user, password, database, pool_name: str = "car_parking", pool_size: int = 3,
+                 pool_timeout: float = 30.0):
+        """Inicializa el pool de conexiones a la base de datos."""
+        self.config = {"host": host, "user": user, "password": password, "database": database}
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.pool = None
+        self._slots = None  # Semáforo con las conexiones libres del pool compartido
+        self._pool_key = (host, user, database, pool_name)
+        self._statements = {}  # (conexión, sesión) -> {consulta: cursor preparado}
+        self._statements_lock = threading.Lock()
+        self._schema_ready = False  # Tablas propias creadas (en la primera conexión exitosa)
+        self._schema_lock = threading.Lock()
         try:
-            self.connection = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database
-            )
-            if self.connection.is_connected():
-                print("Conexión exitosa a la base de datos.")
+            with self._connection():
+                pass
+            print("Conexión exitosa a la base de datos.")
         except mysql.connector.Error as e:
             print(f"Error al conectar a la base de datos: {e}")
-            self.connection = None
+
+    def _ensure_schema(self, connection):
+        """Crea parking_events y current_state (sembrando esta con el historial) una sola vez.
+
+        Se llama con la primera conexión que se logra, así que también funciona si MySQL
+        no respondía al crear el gestor y el pool se creó después.
+        """
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(self.EVENTS_TABLE_QUERY)
+                cursor.execute(self.CURRENT_STATE_TABLE_QUERY)
+                cursor.execute("SELECT 1 FROM current_state LIMIT 1")
+                if cursor.fetchone() is None:
+                    # Tabla recién creada: tomar el último estado de cada espacio del historial
+                    cursor.execute(self.SEED_CURRENT_STATE_QUERY)
+            connection.commit()
+            self._schema_ready = True
+
+    def _get_pool(self):
+        """Devuelve el pool compartido, creándolo si todavía no existe."""
+        if self.pool is not None:
+            return self.pool
+        with self._pools_lock:
+            entry = self._pools.get(self._pool_key)
+            if entry is None:
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=self.pool_name,
+                    pool_size=self.pool_size,
+                    pool_reset_session=False,  # Conservar las sentencias preparadas entre usos
+                    **self.config
+                )
+                entry = self._pools[self._pool_key] = [pool, 0, threading.BoundedSemaphore(self.pool_size)]
+            entry[1] += 1
+            self.pool, self._slots = entry[0], entry[2]
+        return self.pool
+
+    @contextmanager
+    def _connection(self):
+        """Toma una conexión sana del pool y la devuelve al terminar (con rollback si hubo error)."""
+        pool = self._get_pool()
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise mysql.connector.errors.PoolError("No se liberó ninguna conexión del pool a tiempo")
+        try:
+            connection = pool.get_connection()
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            connection.ping(reconnect=True, attempts=2, delay=0)
+            if not self._schema_ready:
+                self._ensure_schema(connection)
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+            except mysql.connector.Error:
+                pass
+            raise
+        finally:
+            connection.close()  # Devuelve la conexión al pool
+            self._slots.release()
+
+    def _prepared(self, connection, query: str):
+        """Devuelve un cursor preparado para la consulta, reutilizado en la misma sesión de la conexión."""
+        raw = getattr(connection, "_cnx", connection)  # Conexión real detrás del proxy del pool
+        key = (id(raw), raw.connection_id)
+        with self._statements_lock:
+            statements = self._statements.get(key)
+            if statements is None:
+                # La conexión se reconectó: las sentencias de la sesión anterior murieron con
+                # ella. Solo se olvidan; cerrarlas enviaría sus ids a la sesión nueva, donde
+                # pueden corresponder a sentencias preparadas por otro gestor del pool.
+                for old_key in [k for k in self._statements if k[0] == key[0]]:
+                    del self._statements[old_key]
+                statements = self._statements[key] = {}
+            cursor = statements.get(query)
+            if cursor is None:
+                cursor = statements[query] = connection.cursor(prepared=True)
+        return cursor
 
     def close_connection(self):
-        """Cierra la conexión a la base de datos."""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Libera los cursores de este gestor y, si nadie más usa el pool, cierra sus conexiones.
+
+        Solo se habla con el servidor por conexiones que este gestor saca del pool (con
+        su lugar en el semáforo), nunca por una que otro gestor esté usando. Las
+        sentencias de conexiones ocupadas solo se olvidan: el servidor las libera al
+        terminar esa sesión. El último gestor espera a que se devuelvan todas las
+        conexiones y las desconecta.
+        """
+        if self.pool is None:
+            with self._statements_lock:
+                self._statements.clear()
+            return
+        last = False
+        with self._pools_lock:
+            entry = self._pools.get(self._pool_key)
+            if entry is not None and entry[0] is self.pool:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._pools[self._pool_key]
+                    last = True
+
+        held = []
+        try:
+            for _ in range(self.pool.pool_size):
+                if last:
+                    acquired = self._slots.acquire(timeout=self.pool_timeout)
+                else:
+                    acquired = self._slots.acquire(blocking=False)
+                if not acquired:
+                    break
+                try:
+                    held.append(self.pool.get_connection())
+                except mysql.connector.Error:
+                    self._slots.release()
+                    break
+            with self._statements_lock:
+                for connection in held:
+                    raw = getattr(connection, "_cnx", connection)
+                    statements = self._statements.pop((id(raw), raw.connection_id), {})
+                    try:
+                        if last:
+                            connection.disconnect()  # Las sentencias preparadas mueren con la sesión
+                        else:
+                            for cursor in statements.values():
+                                cursor.close()
+                    except mysql.connector.Error:
+                        pass
+                self._statements.clear()
+        finally:
+            for connection in held:
+                connection.close()  # Vuelve al pool (desconectada si era el último gestor)
+                self._slots.release()
+        if last:
             print("Conexión cerrada.")
+        self.pool = None
+        self._slots = None
 
     def insert_parking_record(self, parking_spaces_id, hora_llegada):
         """Inserta un registro de entrada en la tabla parking_records."""
         try:
-            cursor = self.connection.cursor()
-            query = """
-                INSERT INTO parking_records (parking_spaces_id, hora_llegada)
-                VALUES (%s, %s)
-            """
-            cursor.execute(query, (parking_spaces_id, hora_llegada))
-            self.connection.commit()
+            with self._connection() as connection:
+                self._prepared(connection, self.INSERT_RECORD_QUERY).execute(
+                    self.INSERT_RECORD_QUERY, (parking_spaces_id, hora_llegada))
+                connection.commit()
             print(f"Registro de entrada insertado para el espacio {parking_spaces_id}.")
         except mysql.connector.Error as e:
             print(f"Error al insertar registro de entrada en la base de datos: {e}")
@@ -46,14 +261,10 @@ class ParkingDatabaseManager:
     def update_parking_record(self, parking_spaces_id, hora_salida):
         """Actualiza un registro existente con la hora de salida y calcula la duración."""
         try:
-            cursor = self.connection.cursor()
-            query = """
-                UPDATE parking_records
-                SET hora_salida = %s, duracion = TIMEDIFF(%s, hora_llegada)
-                WHERE parking_spaces_id = %s AND hora_salida IS NULL
-            """
-            cursor.execute(query, (hora_salida, hora_salida, parking_spaces_id))
-            self.connection.commit()
+            with self._connection() as connection:
+                self._prepared(connection, self.UPDATE_RECORD_QUERY).execute(
+                    self.UPDATE_RECORD_QUERY, (hora_salida, hora_salida, parking_spaces_id))
+                connection.commit()
             print(f"Registro actualizado para el espacio {parking_spaces_id} con hora de salida.")
         except mysql.connector.Error as e:
             print(f"Error al actualizar registro en la base de datos: {e}")
@@ -61,36 +272,104 @@ class ParkingDatabaseManager:
     def update_space_status(self, parking_spaces_id, estado):
         """Actualiza el estado de un espacio en la tabla state_date."""
         try:
-            cursor = self.connection.cursor()
             fecha_actual = datetime.now().date()
             hora_actual = datetime.now().time()
-            query = """
-                INSERT IGNORE INTO state_date (parking_spaces_id_sd, fecha, estado, hora_cambio)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (parking_spaces_id, fecha_actual, estado, hora_actual))
-            self.connection.commit()
+            with self._connection() as connection:
+                row = (parking_spaces_id, fecha_actual, estado, hora_actual)
+                self._prepared(connection, self.INSERT_STATE_QUERY).execute(self.INSERT_STATE_QUERY, row)
+                self._prepared(connection, self.UPSERT_CURRENT_STATE_QUERY).execute(
+                    self.UPSERT_CURRENT_STATE_QUERY, row)
+                connection.commit()
             print(f"Estado del espacio {parking_spaces_id} actualizado a '{estado}'.")
         except mysql.connector.Error as e:
             print(f"Error al actualizar el estado del espacio: {e}")
 
+    def write_events(self, events: list) -> bool:
+        """Escribe un lote de transiciones (``ParkingEvent``) en una sola transacción.
+
+        Las llegadas y salidas consecutivas se agrupan con ``executemany`` respetando el
+        orden del lote, y luego se insertan todos los cambios de estado en state_date y el
+        último de cada espacio en current_state.
+        Los INSERT usan un cursor normal para que ``executemany`` los envíe como una
+        sola sentencia de varias filas. Los eventos ya registrados en parking_events se
+        omiten y los nuevos se registran en la misma transacción.
+        """
+        try:
+            with self._connection() as connection, closing(connection.cursor()) as cursor:
+                ids = event_ids(events)
+                if ids:
+                    cursor.execute(
+                        f"SELECT event_id FROM parking_events WHERE event_id IN ({', '.join(['%s'] * len(ids))})",
+                        ids)
+                    events = pending_events(events, [row[0] for row in cursor.fetchall()])
+                if not events:
+                    return True
+                for estado, group in group_events(events):
+                    if estado == "Ocupado":
+                        cursor.executemany(self.INSERT_RECORD_QUERY,
+                                           [(event.space_id, event.timestamp) for event in group])
+                    else:
+                        self._prepared(connection, self.UPDATE_RECORD_QUERY).executemany(
+                            self.UPDATE_RECORD_QUERY,
+                            [(event.timestamp, event.timestamp, event.space_id) for event in group])
+
+                cursor.executemany(self.INSERT_STATE_QUERY, [
+                    (event.space_id, event.timestamp.date(), event.estado, event.timestamp.time())
+                    for event in events
+                ])
+                cursor.executemany(self.UPSERT_CURRENT_STATE_QUERY, [
+                    (event.space_id, event.timestamp.date(), event.estado, event.timestamp.time())
+                    for event in latest_by_space(events)
+                ])
+                cursor.executemany(self.INSERT_EVENT_QUERY, [(event_id,) for event_id in event_ids(events)])
+                connection.commit()
+            return True
+        except mysql.connector.Error as e:
+            print(f"Error al escribir {len(events)} eventos en la base de datos: {e}")
+            return False
+
 
 class Park_classifier:
     """Clasifica espacios de estacionamiento como libres u ocupados basándose en procesamiento de imágenes."""
 
-    def __init__(self, carp_park_positions_path: str, rect_width: int = 50, rect_height: int = 30):
+    def __init__(self, carp_park_positions_path: str, rect_width: int = 50, rect_height: int = 30,
+                 crop_to_lot: bool = False, motion_noise_floor: float = 6.0, full_refresh_frames: int = 150,
+                 exit_ratio: float = 0.8, min_dwell_frames: int = 3, min_dwell_seconds: float = 0.0,
+                 storage: ParkingStorage = None, journal_path: str = "parking_events.journal",
+                 stats_path: str = "estadisticas_permanencia.npz"):
         self.car_park_positions = self._read_positions(carp_park_positions_path)
+        self.space_thresholds = self._read_space_thresholds(carp_park_positions_path)
         self.rect_width = rect_width
         self.rect_height = rect_height
+        self.layout = None  # Geometría compilada de los espacios (se crea con el primer cuadro)
+        self.counter = None  # Conteo de píxeles en una sola pasada sobre self.layout
+        self.preprocessor = FramePreprocessor()  # Preprocesamiento con búferes reutilizables
+        self.crop_to_lot = crop_to_lot  # Procesar solo la región que cubre los espacios
+        self.motion_noise_floor = motion_noise_floor  # Diferencia media mínima para reclasificar un espacio
+        self.motion_gate = None  # Detector de cambios para evaluate_frame
+        self.skipped_frames = 0  # Cuadros sin cambios que no se volvieron a procesar
+        self.full_refresh_frames = full_refresh_frames  # Cada cuántos cuadros evaluate_frame reclasifica todo
+        self._frames_since_full = 0
 
-        # Inicialización del gestor de la base de datos
-        self.db_manager = ParkingDatabaseManager(
+        # Inicialización del gestor de la base de datos (MySQL local si no se indica otro almacenamiento)
+        self.db_manager = storage if storage is not None else ParkingDatabaseManager(
             host="localhost",
             user="root",
             password="",
             database="car_parking"
         )
+        # Bitácora local para no perder transiciones si la base de datos no responde (None la desactiva)
+        self.journal = EventJournal(journal_path) if journal_path else None
+        # Escritura de las transiciones en segundo plano, fuera del bucle de video
+        self.db_writer = AsyncParkingWriter(self.db_manager, journal=self.journal)
         self.espacios_ocupados = {}  # Diccionario para registrar ocupaciones y salidas de espacios
+        self.snapshot = OccupancySnapshot(len(self.car_park_positions))  # Estado servido por la API
+        # Estadísticas de permanencia actualizadas con cada salida (None las desactiva)
+        self.dwell_stats = DwellStats(len(self.car_park_positions), stats_path) if stats_path else None
+        self.counts = None  # Conteos de la última clasificación
+        self.exit_ratio = exit_ratio  # Umbral de salida como fracción del umbral de entrada
+        # Estado estable de cada espacio con histéresis y permanencia mínima
+        self.debouncer = OccupancyDebouncer(len(self.car_park_positions), min_dwell_frames, min_dwell_seconds)
 
     def _read_positions(self, carp_park_positions_path: str) -> list:
         """Lee las posiciones de los espacios de estacionamiento desde un archivo JSON."""
@@ -105,66 +384,134 @@ class Park_classifier:
             print(f"Error al leer las posiciones: {e}")
             return []
 
-    def classify(self, image: np.ndarray, processed_image: np.ndarray, threshold: int = 300) -> np.ndarray:
-        """Clasifica los espacios de estacionamiento como libres u ocupados."""
-        empty_car_park = 0
+    def _read_space_thresholds(self, carp_park_positions_path: str) -> np.ndarray:
+        """Lee el umbral de ocupación propio de cada espacio (clave opcional "threshold" en positions.json).
 
-        for idx, pos in enumerate(self.car_park_positions, start=1):
-            x, y, angle, width, height = pos
+        El umbral es la fracción del área del espacio que debe tener píxeles no nulos para
+        considerarlo ocupado; NaN indica que el espacio usa el umbral general.
+        """
+        thresholds = np.full(len(self.car_park_positions), np.nan, dtype=np.float32)
+        try:
+            with open(carp_park_positions_path, "r") as f:
+                data = json.load(f)
+            for i, pos in enumerate(data[:len(thresholds)]):
+                if pos.get("threshold") is not None:
+                    thresholds[i] = pos["threshold"]
+        except Exception:
+            pass  # El error ya se informó al leer las posiciones
+        return thresholds
 
-            # Definir el centro de rotación
-            center = (x + width // 2, y + height // 2)
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
+    def _get_layout(self, frame_shape: tuple) -> ParkingLayout:
+        """Devuelve la geometría compilada para la resolución del cuadro, recompilándola si cambia."""
+        if self.layout is None or self.layout.frame_shape != tuple(frame_shape[:2]):
+            self.layout = ParkingLayout(self.car_park_positions, frame_shape)
+            self.counter = OccupancyCounter(self.layout)
+        return self.layout
 
-            # Crear el rectángulo y aplicar la rotación
-            rect = np.array([
-                [x, y],
-                [x + width, y],
-                [x + width, y + height],
-                [x, y + height]
-            ], dtype=np.float32)
+    def evaluate(self, processed_image: np.ndarray, threshold: int = 300, exit_threshold: int = None) -> OccupancyResult:
+        """Clasifica los espacios sin dibujar nada y registra las transiciones en la base de datos.
 
-            rotated_rect = cv2.transform(np.array([rect]), M)[0]
+        Los conteos se normalizan por el área de cada espacio. Un espacio se ocupa
+        cuando su razón llega a su umbral (el de positions.json o el equivalente de
+        ``threshold`` píxeles para su área) y se libera al bajar de ese umbral por
+        ``exit_threshold / threshold`` (por defecto ``exit_ratio``), siempre que el
+        cambio se mantenga el tiempo mínimo configurado.
+        """
+        # Conteo de píxeles no nulos de todos los espacios en una sola pasada
+        self._get_layout(processed_image.shape)
+        self.counts = self.counter.count(processed_image)
+        return self._update_state(threshold, exit_threshold)
 
-            # Crear máscara para contar píxeles no nulos
-            mask = np.zeros_like(processed_image)
-            cv2.fillPoly(mask, [np.int32(rotated_rect)], 255)
-            crop = cv2.bitwise_and(processed_image, mask)
+    def _update_state(self, threshold: int, exit_threshold: int = None) -> OccupancyResult:
+        """Aplica la histéresis a las razones de ocupación actuales y registra las transiciones estables."""
+        exit_fraction = self.exit_ratio if exit_threshold is None else exit_threshold / threshold
+        ratios = occupancy_ratios(self.counts, self.layout.areas)
+        enter_thresholds = ratio_thresholds(threshold, self.layout.areas, self.space_thresholds)
 
-            count = cv2.countNonZero(crop)
+        flipped = self.debouncer.update(ratios, enter_thresholds, enter_thresholds * exit_fraction)
+        transitions = self._apply_transitions(flipped)
+        return OccupancyResult(occupied=self.debouncer.state.copy(), counts=self.counts.copy(), ratios=ratios,
+                               confidence=occupancy_confidence(ratios, enter_thresholds), transitions=transitions)
 
-            if count < threshold:
-                empty_car_park += 1
-                color, thickness = (0, 255, 0), 2  # Verde para espacio libre
+    def evaluate_frame(self, image: np.ndarray, threshold: int = 300, exit_threshold: int = None) -> OccupancyResult:
+        """Preprocesa y clasifica un cuadro, reclasificando solo los espacios que cambiaron.
 
-                # Registrar salida si estaba ocupado
-                if idx in self.espacios_ocupados:
-                    hora_llegada = self.espacios_ocupados.pop(idx)
-                    hora_salida = datetime.now()
-                    print("Hora del sistema", hora_salida)
-                    self.db_manager.update_parking_record(idx, hora_salida)
-                    self.db_manager.update_space_status(idx, "Libre")
-            else:
-                color, thickness = (0, 0, 255), 2  # Rojo para espacio ocupado
+        Los espacios sin cambios conservan su último conteo. Si ningún espacio cambió
+        (cuadro idéntico o repetido por la cámara IP) no se procesa nada. Cada
+        ``full_refresh_frames`` cuadros se reclasifican todos los espacios por si algún
+        cambio quedó bajo el umbral del detector.
+        """
+        layout = self._get_layout(image.shape)
+        if self.motion_gate is None or self.motion_gate.layout is not layout:
+            self.motion_gate = MotionGate(layout, FramePreprocessor.PADDING, noise_floor=self.motion_noise_floor)
+            self.counts = None
+
+        changed = self.motion_gate.changed_spaces(image)
+        self._frames_since_full += 1
+        if self.counts is None or self._frames_since_full >= self.full_refresh_frames:
+            # Primer cuadro o refresco periódico: clasificación completa
+            self._frames_since_full = 0
+            self.motion_gate.accept_all()
+            return self.evaluate(self.implement_process(image), threshold, exit_threshold)
+
+        indices = np.flatnonzero(changed)
+        if indices.size == 0:
+            # Sin procesar la imagen; la histéresis sigue contando el tiempo de permanencia
+            self.skipped_frames += 1
+            return self._update_state(threshold, exit_threshold)
+
+        # Procesar solo la región que cubre los espacios que cambiaron
+        roi = layout.padded_bounds(FramePreprocessor.PADDING, indices)
+        processed_image = self.preprocessor.process(image, roi)
+        self.counts[indices] = layout.count_spaces(processed_image, indices)
+        self.motion_gate.accept(indices)
 
+        return self._update_state(threshold, exit_threshold)
+
+    def _apply_transitions(self, flipped: np.ndarray) -> list:
+        """Registra entradas y salidas de los espacios cuyo estado estable acaba de cambiar."""
+        transitions = []
+        for i in flipped:
+            idx = int(i) + 1
+            if self.debouncer.state[i]:
                 # Registrar entrada si estaba libre
-                if idx not in self.espacios_ocupados:
-                    self.espacios_ocupados[idx] = datetime.now()
-                    self.db_manager.insert_parking_record(idx, self.espacios_ocupados[idx])
-                    self.db_manager.update_space_status(idx, "Ocupado")
+                self.espacios_ocupados[idx] = datetime.now()
+                event = ParkingEvent.create(idx, "Ocupado", self.espacios_ocupados[idx])
+            else:
+                # Registrar salida si estaba ocupado
+                hora_llegada = self.espacios_ocupados.pop(idx, None)
+                hora_salida = datetime.now()
+                print("Hora del sistema", hora_salida)
+                if self.dwell_stats is not None and hora_llegada is not None:
+                    self.dwell_stats.record(idx, hora_llegada, hora_salida)
+                event = ParkingEvent.create(idx, "Libre", hora_salida)
+            self.db_writer.submit(event)
+            transitions.append((idx, event.estado, event.timestamp))
+
+        self.snapshot.update(transitions)
+        return transitions
+
+    def render(self, image: np.ndarray, result: OccupancyResult) -> np.ndarray:
+        """Dibuja sobre la imagen los espacios según el resultado de ``evaluate``."""
+        for i, is_occupied in enumerate(result.occupied):
+            color = (0, 0, 255) if is_occupied else (0, 255, 0)  # Rojo ocupado, verde libre
 
             # Dibujar el rectángulo rotado en la imagen original
-            cv2.polylines(image, [np.int32(rotated_rect)], isClosed=True, color=color, thickness=thickness)
+            cv2.polylines(image, [self.layout.polygons[i]], isClosed=True, color=color, thickness=2)
 
             # Mostrar el número del espacio dentro del rectángulo
-            text_position = (int(center[0] - width // 4), int(center[1] + 5))
-            cv2.putText(image, f"{idx}", text_position, cv2.FONT_HERSHEY_SIMPLEX, 0.3, (255, 255, 255), 1)
+            cv2.putText(image, f"{i + 1}", self.layout.anchors[i], cv2.FONT_HERSHEY_SIMPLEX, 0.3, (255, 255, 255), 1)
 
         # Agregar indicador de espacios libres y ocupados
-        self._draw_indicator(image, empty_car_park)
+        self._draw_indicator(image, result.free_count)
 
         return image
 
+    def classify(self, image: np.ndarray, processed_image: np.ndarray, threshold: int = 300) -> np.ndarray:
+        """Clasifica los espacios de estacionamiento como libres u ocupados."""
+        result = self.evaluate(processed_image, threshold)
+        return self.render(image, result)
+
     def _draw_indicator(self, image: np.ndarray, empty_car_park: int):
         """Dibuja un indicador en la esquina superior izquierda mostrando espacios libres y ocupados."""
         total_spaces = len(self.car_park_positions)
@@ -179,17 +526,32 @@ class Park_classifier:
     def handle_exit(self):
         """Registra la salida de todos los espacios ocupados al cerrar el programa."""
         hora_salida = datetime.now() - timedelta(seconds=1)  # Restar un segundo para evitar inconsistencias
+        departures = []
         for idx in list(self.espacios_ocupados.keys()):
-            self.db_manager.update_parking_record(idx, hora_salida)
-            self.db_manager.update_space_status(idx, "Libre")
+            self.db_writer.submit(ParkingEvent.create(idx, "Libre", hora_salida))
             self.espacios_ocupados.pop(idx)
+            departures.append((idx, "Libre", hora_salida))
+        self.snapshot.update(departures)
+        self.debouncer.reset()
+        self.db_writer.flush()  # Esperar a que las salidas queden escritas
+
+    def close(self):
+        """Termina de escribir los eventos pendientes y cierra la conexión a la base de datos."""
+        self.db_writer.close()
+        if self.journal is not None:
+            self.journal.close()
+        if self.dwell_stats is not None:
+            self.dwell_stats.close()  # Las salidas forzadas de handle_exit no cuentan como estadías
+        self.db_manager.close_connection()
 
     def implement_process(self, image: np.ndarray) -> np.ndarray:
-        """Procesa la imagen para preparar la clasificación."""
-        kernel_size = np.ones((2, 2), np.uint8)  # Reducido para mejor detección
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        blur = cv2.GaussianBlur(gray, (5, 5), 1)  # Ajustar para imágenes pequeñas
-        thresholded = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 19, 9)
-        blur = cv2.medianBlur(thresholded, 3)
-        dilate = cv2.dilate(blur, kernel_size, iterations=2)  # Iteraciones ajustadas
-        return dilate
+        """Procesa la imagen para preparar la clasificación.
+
+        Devuelve un búfer reutilizado por ``self.preprocessor``: se sobrescribe en el siguiente cuadro.
+        Con ``crop_to_lot`` solo se procesa la región de los espacios (con el margen que
+        necesitan los filtros), fuera de ella el resultado queda en cero.
+        """
+        roi = None
+        if self.crop_to_lot:
+            roi = self._get_layout(image.shape).padded_bounds(FramePreprocessor.PADDING)
+        return self.preprocessor.process(image, roi)
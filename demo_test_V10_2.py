@@ -1,6 +1,10 @@
+import os
 import cv2
 import numpy as np
 from src.utils_V9 import Park_classifier  # Asegúrate de usar utils_v3 actualizado
+from src.capture import CameraStream
+from src.storage import SQLiteParkingStorage
+from src.api import OccupancyAPIServer
 
 # Variables globales
 close_app = False
@@ -136,7 +140,7 @@ def show_camera_status():
     new_cap = cv2.VideoCapture(camera_url)
     if new_cap.isOpened():
         cap.release()  # Liberar la cámara actual
-        cap = new_cap  # Asignar la nueva cámara
+        cap = CameraStream(new_cap)  # Asignar la nueva cámara con captura en segundo plano
         message = "Camara conectada"
         color = (0, 255, 0)  # Verde
     else:
@@ -164,8 +168,21 @@ def demostration():
     positions_json_path = "positions.json"  # Ruta al archivo JSON
     rect_width, rect_height = 50, 30  # Tamaños predeterminados de los cuadros
 
+    # Almacenamiento: SQLite local si se define SMARTPARKING_SQLITE, MySQL en otro caso
+    sqlite_path = os.environ.get("SMARTPARKING_SQLITE")
+    storage = SQLiteParkingStorage(sqlite_path) if sqlite_path else None
+
     # Creando la instancia del clasificador
-    classifier = Park_classifier(positions_json_path, rect_width, rect_height)
+    classifier = Park_classifier(positions_json_path, rect_width, rect_height, crop_to_lot=True, storage=storage)
+
+    # API HTTP con el estado en memoria para el tablero (puerto en SMARTPARKING_API_PORT)
+    try:
+        api_server = OccupancyAPIServer(classifier.snapshot, port=int(os.environ.get("SMARTPARKING_API_PORT", 8001)),
+                                        dwell_stats=classifier.dwell_stats)
+        api_server.start()
+    except OSError as e:
+        api_server = None
+        print(f"No se pudo iniciar la API de ocupación: {e}")
 
     # Obtener las cámaras disponibles
     cameras = get_available_cameras()
@@ -173,8 +190,8 @@ def demostration():
         print("No se encontraron cámaras disponibles.")
         return
 
-    # Inicializa la captura de video desde la cámara actual
-    cap = cv2.VideoCapture(cameras[current_camera_index])
+    # Inicializa la captura de video desde la cámara actual en un hilo propio
+    cap = CameraStream(cameras[current_camera_index])
 
     # Definir las coordenadas y tamaño del botón "Close Camera"
     button_x, button_y, button_width, button_height = 500, 30, 120, 40
@@ -197,11 +214,11 @@ def demostration():
             if not ret:
                 break
             
-            # Procesando los frames para preparar la clasificación
-            processed_frame = classifier.implement_process(frame)
+            # Clasificando solo los espacios que cambiaron desde el cuadro anterior
+            result = classifier.evaluate_frame(frame)
             
             # Dibujando los espacios de estacionamiento de acuerdo a su estado 
-            denoted_image = classifier.classify(image=frame, processed_image=processed_frame)
+            denoted_image = classifier.render(frame, result)
 
             # Dibujar el botón 'Close Camera'
             cv2.rectangle(denoted_image, (button_x, button_y), (button_x + button_width, button_y + button_height), COLOR_BOTON_FONDO, -1)
@@ -233,7 +250,7 @@ def demostration():
             if k & 0xFF == ord('c'):  # Presiona 'c' para cambiar de cámara
                 cap.release()  # Liberar la cámara actual
                 current_camera_index = (current_camera_index + 1) % len(cameras)  # Cambiar al siguiente índice
-                cap = cv2.VideoCapture(cameras[current_camera_index])  # Abrir la nueva cámara
+                cap = CameraStream(cameras[current_camera_index])  # Abrir la nueva cámara
                 print(f"Cámara cambiada a: {cameras[current_camera_index]}")
 
             if k & 0xFF == 9:  # Presiona 'Tab' para ingresar una URL de cámara
@@ -243,9 +260,12 @@ def demostration():
         # Asegurarse de guardar registros de salida pendientes al cerrar
         print("Guardando registros de salida antes de cerrar...")
         classifier.handle_exit()
+        print(f"Cuadros descartados sin decodificar: {cap.dropped_frames}")
         cap.release()
         cv2.destroyAllWindows()
-        classifier.db_manager.close_connection()  # Cerrar la conexión a la base de datos
+        if api_server is not None:
+            api_server.stop()
+        classifier.close()  # Escribir los eventos pendientes y cerrar la conexión a la base de datos
 
 if __name__ == "__main__":
     demostration()
\ No newline at end of file